@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+
+from apps.core.exports import export_rows
+
+User = get_user_model()
+
+USER_COLUMNS = (
+    ("id", "id"),
+    ("username", "username"),
+    ("first_name", "first_name"),
+    ("last_name", "last_name"),
+    ("email", "email"),
+    ("phone_number", "phone_number"),
+    ("is_active", "is_active"),
+    ("last_login", "last_login"),
+    ("date_joined", "date_joined"),
+)
+
+
+def export_users():
+    return export_rows(User.objects.order_by("id"), USER_COLUMNS)
@@ -1,10 +1,17 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.contrib.auth.models import Group
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
 from django.conf import settings
-from django.core.mail import send_mail
+from apps.core.images import get_manifest
+from apps.core.mail import enqueue_mail
+from apps.core.metrics import EMAILS_QUEUED
+from apps.core.helpers import (
+    clear_user_roles,
+    invalidate_all_roles,
+    invalidate_user_roles,
+)
 
 User = get_user_model()
 
@@ -21,10 +28,8 @@ def send_activation_email(sender, instance, created, **kwargs):
         message = f"Hi {instance.username}, \n\n Please activate your account by clicking the link below:\n{activation_url}\n\nThank You!"
         recipient_list = [instance.email]
 
-        try:
-            send_mail(subject, message, settings.EMAIL_HOST_USER, recipient_list)
-        except Exception as e:
-            print(f"Failed to send email to {instance.email}: {str(e)}")
+        enqueue_mail(subject, message, recipient_list, settings.EMAIL_HOST_USER)
+        EMAILS_QUEUED.inc(kind="activation")
 
 
 @receiver(post_save, sender=User)
@@ -38,3 +43,32 @@ def assign_default_role(sender, instance, created, **kwargs):
         if was_created:
             print("Created new group: Participant")
         print(f"User {instance.username} assigned to Participant group")
+
+
+@receiver(post_save, sender=User)
+def prepare_profile_image_derivatives(sender, instance, raw, update_fields, **kwargs):
+    if raw or not instance.profile_image:
+        return
+    if update_fields is not None and "profile_image" not in update_fields:
+        return
+    get_manifest(instance.profile_image.name)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def clear_cached_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        clear_user_roles(instance)
+        invalidate_user_roles(instance.pk)
+    elif pk_set:
+        invalidate_user_roles(*pk_set)
+    else:
+        invalidate_all_roles()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def clear_cached_roles_for_group(sender, instance, **kwargs):
+    invalidate_all_roles()
@@ -17,6 +17,7 @@ from .views import (
     UserListView,
     AssignRoleView,
     DeleteUserView,
+    ExportUsersView,
 )
 
 app_name = "accounts"
@@ -53,4 +54,5 @@ urlpatterns = [
         DeleteUserView.as_view(),
         name="delete-user",
     ),
+    path("admin/user-list/export/", ExportUsersView.as_view(), name="export-users"),
 ]
@@ -13,7 +13,9 @@ from apps.accounts.forms import (
 )
 from django.contrib import messages
 from django.contrib.auth.models import Group
+from apps.accounts.exports import export_users
 from apps.accounts.models import CustomUser
+from apps.core.exports import ExportMixin
 from apps.core.helpers import is_admin
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth import get_user_model
@@ -458,3 +460,18 @@ class DeleteUserView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     def get(self, request, *args, **kwargs):
         messages.error(request, "Invalid request.")
         return redirect("accounts:user-list")
+
+
+class ExportUsersView(LoginRequiredMixin, UserPassesTestMixin, ExportMixin, View):
+    export_name = "users"
+
+    def test_func(self):
+        return is_admin(self.request.user)
+
+    def handle_no_permission(self):
+        if not self.request.user.is_authenticated:
+            return super().handle_no_permission()
+        return redirect("core:no-permission")
+
+    def get_export(self):
+        return export_users()
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.core.models import OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "next_attempt_at", "created_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "recipients")
+    readonly_fields = ("created_at", "sent_at", "last_error")
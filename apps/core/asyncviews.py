@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _executor_instance():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_QUERY_WORKERS,
+                thread_name_prefix="async-queries",
+            )
+        return _executor
+
+
+def _in_transaction():
+    return any(
+        connection.in_atomic_block
+        for connection in connections.all(initialized_only=True)
+    )
+
+
+def _run_in_order(queries):
+    return {name: query() for name, query in queries.items()}
+
+
+def _isolated(query):
+    def run():
+        try:
+            return query()
+        finally:
+            # What the request_finished signal does for the request's own
+            # connections: honour CONN_MAX_AGE and drop broken connections.
+            for connection in connections.all(initialized_only=True):
+                connection.close_if_unusable_or_obsolete()
+
+    return run
+
+
+async def gather_queries(queries):
+    """Run the callables in ``queries``, a dict, at the same time and return
+    their results under the same keys.
+
+    Django's async ORM hands every query to the one thread that owns the
+    request's connection, so gathering ``aget()`` or ``async for`` calls
+    still runs them one after another. Each callable runs on a thread of a
+    pool of ``ASYNC_QUERY_WORKERS`` instead, with that thread's own
+    connection. Inside a transaction (``ATOMIC_REQUESTS``, tests) other
+    connections cannot see its uncommitted rows, so the callables run in
+    order on the request's connection.
+    """
+    if await sync_to_async(_in_transaction)():
+        return await sync_to_async(_run_in_order)(queries)
+
+    executor = _executor_instance()
+    results = await asyncio.gather(
+        *(
+            sync_to_async(_isolated(query), thread_sensitive=False, executor=executor)()
+            for query in queries.values()
+        )
+    )
+    return dict(zip(queries, results))
+
+
+class AsyncAccessMixin:
+    """``dispatch`` for async views subclassing views that use
+    LoginRequiredMixin and UserPassesTestMixin.
+
+    Those mixins read ``request.user`` synchronously, which would load the
+    session and user from the event loop. This loads them with
+    ``request.auser()``, runs ``test_func`` in a thread and then awaits the
+    handler. The view's ``handle_no_permission`` is used as before.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+
+        get_test_func = getattr(self, "get_test_func", None)
+        if get_test_func and not await sync_to_async(get_test_func())():
+            return self.handle_no_permission()
+
+        method = request.method.lower()
+        if method in self.http_method_names:
+            handler = getattr(self, method, self.http_method_not_allowed)
+        else:
+            handler = self.http_method_not_allowed
+        return await handler(request, *args, **kwargs)
@@ -0,0 +1,326 @@
+import http.client
+import math
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import time as clock, timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from apps.events.models import RSVP, Category, Event
+from apps.events.search import update_search_vectors
+from apps.events.stats import rebuild_dashboard_stats
+
+User = get_user_model()
+
+ROLES = ("anonymous", "participant", "organizer", "admin")
+
+BENCH_NAMESPACES = ("core", "events", "accounts")
+
+
+@dataclass
+class Fixtures:
+    users: dict
+    event: Event
+    rsvp: RSVP
+    group: Group
+    inactive_user: User
+
+
+def seed(users, categories, events, rsvps_per_user, today=None):
+    """Bulk-load a dataset of the given size and return the rows the
+    benchmarked URLs point at.
+
+    Rows are inserted with ``bulk_create``, so signals do not fire; search
+    vectors and the dashboard counters are rebuilt afterwards.
+    """
+    today = today or timezone.localdate()
+    rng = random.Random(0)
+    groups = {
+        name: Group.objects.get_or_create(name=name)[0]
+        for name in ("Admin", "Organizer", "Participant")
+    }
+
+    password = make_password(None)
+    created_users = User.objects.bulk_create(
+        User(
+            username=f"bench{i}",
+            email=f"bench{i}@example.com",
+            password=password,
+        )
+        for i in range(max(users, 3))
+    )
+    admin, organizer, *participants = created_users
+    memberships = [
+        User.groups.through(customuser_id=admin.pk, group_id=groups["Admin"].pk),
+        User.groups.through(
+            customuser_id=organizer.pk, group_id=groups["Organizer"].pk
+        ),
+    ] + [
+        User.groups.through(customuser_id=user.pk, group_id=groups["Participant"].pk)
+        for user in participants
+    ]
+    User.groups.through.objects.bulk_create(memberships)
+
+    created_categories = Category.objects.bulk_create(
+        Category(name=f"Category {i}", description=f"Bench category {i}")
+        for i in range(max(categories, 1))
+    )
+    created_events = Event.objects.bulk_create(
+        Event(
+            name=f"Bench event {i}",
+            description=f"Benchmark event number {i}. " * 8,
+            event_date=today + timedelta(days=i % 730 - 365),
+            event_time=clock(9 + i % 10),
+            location=f"Hall {i % 50}",
+            category=created_categories[i % len(created_categories)],
+        )
+        for i in range(max(events, 1))
+    )
+    rsvps_per_user = min(rsvps_per_user, len(created_events))
+    RSVP.objects.bulk_create(
+        RSVP(user=user, event=event)
+        for user in participants
+        for event in rng.sample(created_events, rsvps_per_user)
+    )
+
+    update_search_vectors(Event.objects.all())
+    rebuild_dashboard_stats(today)
+
+    participant = participants[0]
+    rsvp = RSVP.objects.filter(user=participant).first() or RSVP.objects.create(
+        user=participant, event=created_events[0]
+    )
+    inactive_user = User.objects.create(
+        username="bench-inactive",
+        email="bench-inactive@example.com",
+        password=password,
+        is_active=False,
+    )
+    return Fixtures(
+        users={"participant": participant, "organizer": organizer, "admin": admin},
+        event=rsvp.event,
+        rsvp=rsvp,
+        group=groups["Participant"],
+        inactive_user=inactive_user,
+    )
+
+
+def url_kwargs(fixtures):
+    """Values for the URL parameters, by URL name and then by parameter."""
+    participant = fixtures.users["participant"]
+    return {
+        "events:rsvp-delete": {"id": fixtures.rsvp.pk},
+        "accounts:update-group": {"id": fixtures.group.pk},
+        "accounts:delete-group": {"id": fixtures.group.pk},
+        "accounts:activate": {
+            "user_id": fixtures.inactive_user.pk,
+            "token": default_token_generator.make_token(fixtures.inactive_user),
+        },
+        "accounts:forgot-password-confirm": {
+            "uidb64": urlsafe_base64_encode(force_bytes(participant.pk)),
+            "token": default_token_generator.make_token(participant),
+        },
+        None: {
+            "id": fixtures.event.pk,
+            "event_id": fixtures.event.pk,
+            "user_id": participant.pk,
+        },
+    }
+
+
+def bench_urls(fixtures, namespaces=BENCH_NAMESPACES):
+    """Yield ``(name, path)`` for every URL pattern in ``namespaces``.
+
+    Unnamed patterns are named after their first path segment.
+    """
+    kwargs = url_kwargs(fixtures)
+
+    for resolver in get_resolver().url_patterns:
+        if not isinstance(resolver, URLResolver):
+            continue
+        if resolver.namespace not in namespaces:
+            continue
+
+        for pattern in resolver.url_patterns:
+            route = str(pattern.pattern)
+            label = pattern.name or route.split("/")[0]
+            name = f"{resolver.namespace}:{label}"
+            values = {**kwargs[None], **kwargs.get(name, {})}
+            path = re.sub(
+                r"<(?:\w+:)?(\w+)>",
+                lambda match: str(values[match.group(1)]),
+                f"/{resolver.pattern}{route}",
+            )
+            yield name, path
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    index = max(math.ceil(p / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def _response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def measure(client, path, iterations, warmup):
+    """GET ``path`` repeatedly and summarise latency, queries and size."""
+    timings = []
+    queries = []
+    size = status = None
+
+    for i in range(warmup + iterations):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(path)
+            size = _response_size(response)
+            elapsed = time.perf_counter() - start
+
+        # Flash messages from redirecting views would otherwise pile up in
+        # the cookie and be rendered by whichever page runs next.
+        client.cookies.pop("messages", None)
+
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+        status = response.status_code
+
+    return {
+        "status": status,
+        "queries": max(queries),
+        "bytes": size,
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+    }
+
+
+def role_clients(fixtures):
+    clients = {"anonymous": Client(raise_request_exception=False)}
+    for role, user in fixtures.users.items():
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        clients[role] = client
+    return clients
+
+
+def compare(results, baseline, tolerance):
+    """Return a line for every view that got slower or runs more queries
+    than in ``baseline``."""
+    previous = {(r["role"], r["url"]): r for r in baseline["results"]}
+    regressions = []
+
+    for result in results:
+        before = previous.get((result["role"], result["url"]))
+        if not before:
+            continue
+
+        if result["queries"] > before["queries"]:
+            regressions.append(
+                f"{result['role']} {result['url']}: queries "
+                f"{before['queries']} -> {result['queries']}"
+            )
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{result['role']} {result['url']}: p95 "
+                f"{before['p95_ms']}ms -> {result['p95_ms']}ms"
+            )
+    return regressions
+
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def session_cookie(user):
+    """A ``Cookie`` header value for a new session logged in as ``user``,
+    saved in the session store the server reads."""
+    client = Client()
+    client.force_login(user)
+    return f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+
+def _http_requests(url, path, headers, count, concurrency):
+    """Send ``count`` GETs from ``concurrency`` keep-alive connections and
+    return the responses' ``(milliseconds, status, queries, size)``."""
+    remaining = iter(range(count))
+    lock = threading.Lock()
+
+    def worker():
+        samples = []
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80)
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return samples
+                start = time.perf_counter()
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+                elapsed = time.perf_counter() - start
+                match = SERVER_TIMING_QUERIES.search(
+                    response.getheader("Server-Timing", "")
+                )
+                samples.append(
+                    (
+                        elapsed * 1000,
+                        response.status,
+                        int(match.group(1)) if match else 0,
+                        len(body),
+                    )
+                )
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(worker) for _ in range(concurrency)]
+        return [sample for future in futures for sample in future.result()]
+
+
+def measure_http(base_url, path, cookie, requests, concurrency, warmup):
+    """GET ``base_url + path`` ``requests`` times from ``concurrency``
+    connections at once and summarise latency and throughput.
+
+    Query counts are read from the ``Server-Timing`` header the request
+    metrics middleware adds.
+    """
+    url = urlsplit(base_url)
+    headers = {"Cookie": cookie}
+    if warmup:
+        _http_requests(url, path, headers, warmup, concurrency)
+
+    start = time.perf_counter()
+    samples = _http_requests(url, path, headers, requests, concurrency)
+    elapsed = time.perf_counter() - start
+
+    timings = [sample[0] for sample in samples]
+    return {
+        "status": max(sample[1] for sample in samples),
+        "queries": max(sample[2] for sample in samples),
+        "bytes": samples[-1][3],
+        "requests_per_s": round(requests / elapsed, 1),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+    }
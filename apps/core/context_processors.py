@@ -1,6 +1,6 @@
 from django.conf import settings
 
-from apps.core.helpers import is_admin, is_organizer, is_participant
+from apps.core.helpers import user_role_flags
 
 
 def debug_context(request):
@@ -10,18 +10,4 @@ def debug_context(request):
 
 
 def user_roles_context(request):
-    if request.user.is_authenticated:
-        return {
-            "user_roles": {
-                "is_admin": is_admin(request.user),
-                "is_organizer": is_organizer(request.user),
-                "is_participant": is_participant(request.user),
-            }
-        }
-    return {
-        "user_roles": {
-            "is_admin": False,
-            "is_organizer": False,
-            "is_participant": False,
-        }
-    }
+    return {"user_roles": user_role_flags(request.user)}
@@ -0,0 +1,62 @@
+from django.db import connection
+from django.db.migrations.operations.base import Operation
+
+
+def is_postgresql(conn=None):
+    return (conn or connection).vendor == "postgresql"
+
+
+def estimated_row_count(model):
+    """The planner's row estimate for ``model``'s table, or None when the
+    database has none (not PostgreSQL, or the table was never analyzed)."""
+    if not is_postgresql():
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class PostgreSQLOnly(Operation):
+    """Run the wrapped migration operation's SQL on PostgreSQL only.
+
+    The project state is always updated, so models can declare
+    PostgreSQL-specific indexes without makemigrations seeing drift on other
+    backends.
+    """
+
+    reversible = True
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    def deconstruct(self):
+        return self.__class__.__qualname__, [self.operation], {}
+
+    def state_forwards(self, app_label, state):
+        self.operation.state_forwards(app_label, state)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if is_postgresql(schema_editor.connection):
+            self.operation.database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if is_postgresql(schema_editor.connection):
+            self.operation.database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def describe(self):
+        return f"{self.operation.describe()} (PostgreSQL only)"
+
+    @property
+    def migration_name_fragment(self):
+        return self.operation.migration_name_fragment
@@ -0,0 +1,179 @@
+import csv
+import json
+import re
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+# Spreadsheet apps run a cell starting with one of these as a formula.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# Numbers and phone numbers such as "+880 1711-000000" or "-12.5" start with
+# a sign but can hold no cell reference or function call, so they are left
+# as they are.
+SIGNED_NUMBER = re.compile(r"[+-]\d[\d\s().-]*")
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    if (
+        isinstance(value, str)
+        and value.startswith(FORMULA_PREFIXES)
+        and not SIGNED_NUMBER.fullmatch(value)
+    ):
+        return f"'{value}"
+    return value
+
+
+def _csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def _ndjson_lines(header, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + "\n"
+
+
+def export_chunks(header, rows, fmt, chunk_size=None):
+    """Yield the export as encoded byte chunks.
+
+    The first line is sent on its own so the download starts before the
+    first database batch is read; after that, ``chunk_size`` rows are joined
+    into each chunk.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    lines = _csv_lines(header, rows) if fmt == "csv" else _ndjson_lines(header, rows)
+
+    first = next(lines, None)
+    if first is not None:
+        yield first.encode()
+
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer = []
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def gzip_chunks(chunks):
+    # wbits=31 writes a gzip header and trailer around the deflate stream.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def async_chunks(chunks):
+    """Iterate ``chunks`` from an ASGI server, which would otherwise read a
+    synchronous iterator into memory before sending any of it.
+
+    Each chunk is produced on the request's sync thread, which holds the
+    database connection the rows are read from.
+    """
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+
+def export_rows(queryset, columns):
+    """Return ``(header, rows)`` for ``columns``, a sequence of
+    ``(column name, field lookup)`` pairs.
+
+    Rows are tuples streamed from the database in batches and never cached
+    on the queryset, so memory use does not grow with the number of rows.
+    """
+    header = [name for name, _ in columns]
+    rows = queryset.values_list(*(lookup for _, lookup in columns)).iterator(
+        chunk_size=settings.EXPORT_CHUNK_SIZE
+    )
+    return header, rows
+
+
+def export_response(name, header, rows, fmt="csv", compress=False, asgi=False):
+    """Stream an export as a download. Pass ``asgi=True`` when serving an
+    ASGIRequest."""
+    chunks = export_chunks(header, rows, fmt)
+    filename = f"{name}-{timezone.localdate():%Y%m%d}.{fmt}"
+    content_type = FORMATS[fmt]
+    if compress:
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        content_type = "application/gzip"
+    if asgi:
+        chunks = async_chunks(chunks)
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def write_export(file, header, rows, fmt="csv", compress=False):
+    """Write an export to a binary file object, the same bytes the
+    corresponding response would stream."""
+    chunks = export_chunks(header, rows, fmt)
+    if compress:
+        chunks = gzip_chunks(chunks)
+    for chunk in chunks:
+        file.write(chunk)
+
+
+class ExportMixin:
+    """Stream ``get_export()`` as CSV or NDJSON, picked with ``?format=``;
+    ``?gzip=1`` compresses it on the fly.
+
+    Views define ``get_export()``, returning ``(header, rows)``, and name the
+    download with ``export_name``, which ``get_export()`` may set.
+    """
+
+    export_name = None
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        if not callable(getattr(self, "get_export", None)):
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} must define get_export()."
+            )
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get("format", "csv")
+        if fmt not in FORMATS:
+            fmt = "csv"
+        header, rows = self.get_export()
+        return export_response(
+            self.export_name,
+            header,
+            rows,
+            fmt,
+            compress=request.GET.get("gzip") == "1",
+            asgi=isinstance(request, ASGIRequest),
+        )
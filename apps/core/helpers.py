@@ -1,4 +1,8 @@
+import uuid
+
 from django import forms
+from django.core.cache import cache
+from django.db import transaction
 from django.forms import (
     TextInput,
     EmailInput,
@@ -13,6 +17,8 @@ from django.forms import (
 )
 from typing import TYPE_CHECKING
 
+from apps.core.metrics import CACHE_REQUESTS
+
 
 class StyledFormMixin:
     def __init__(self, *args, **kwargs):
@@ -102,25 +108,124 @@ class StyledFormMixin:
                 )
 
 
+ROLE_CACHE_ATTR = "_role_names_cache"
+ROLE_CACHE_TIMEOUT = 60 * 60
+ROLE_GENERATION_KEY = "roles:generation"
+
+
+def _role_version_key(user_id):
+    return f"roles:version:{user_id}"
+
+
+def _role_data_key(user_id):
+    return f"roles:data:{user_id}"
+
+
+def _new_version():
+    return uuid.uuid4().int
+
+
+def cache_version(key):
+    """Return the version stored under ``key``, creating it if needed.
+
+    Versions are random, so an evicted version can never line up with data
+    still cached under an older one.
+    """
+    cache.add(key, _new_version(), None)
+    return cache.get(key)
+
+
+def bump_cache_version(key):
+    """Replace the version under ``key`` with a new random one.
+
+    Unlike ``cache.incr``, which is a read and a write on the file-based
+    cache, two concurrent bumps can never both land on the same value.
+    """
+    cache.set(key, _new_version(), None)
+
+
+def _load_roles(user):
+    version_key = _role_version_key(user.pk)
+    data_key = _role_data_key(user.pk)
+    cached = cache.get_many([ROLE_GENERATION_KEY, version_key, data_key])
+
+    generation = cached.get(ROLE_GENERATION_KEY) or cache_version(ROLE_GENERATION_KEY)
+    version = cached.get(version_key) or cache_version(version_key)
+
+    entry = cached.get(data_key)
+    if entry and entry[0] == generation and entry[1] == version:
+        CACHE_REQUESTS.inc(cache="roles", result="hit")
+        return entry[2]
+
+    CACHE_REQUESTS.inc(cache="roles", result="miss")
+    roles = frozenset(user.groups.values_list("name", flat=True))
+    cache.set(data_key, (generation, version, roles), ROLE_CACHE_TIMEOUT)
+    return roles
+
+
+def get_user_roles(user):
+    """Return the set of group names for ``user``.
+
+    Roles are memoized on the user object for the rest of the request and
+    shared between processes through the cache framework.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+
+    roles = getattr(user, ROLE_CACHE_ATTR, None)
+    if roles is None:
+        roles = _load_roles(user)
+        setattr(user, ROLE_CACHE_ATTR, roles)
+    return roles
+
+
+def clear_user_roles(user):
+    try:
+        delattr(user, ROLE_CACHE_ATTR)
+    except AttributeError:
+        pass
+
+
+def invalidate_user_roles(*user_ids):
+    """Bump the role version of each user, now and again once the
+    surrounding transaction commits."""
+    keys = [_role_version_key(user_id) for user_id in user_ids]
+
+    def bump():
+        for key in keys:
+            bump_cache_version(key)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_all_roles():
+    bump_cache_version(ROLE_GENERATION_KEY)
+    transaction.on_commit(lambda: bump_cache_version(ROLE_GENERATION_KEY))
+
+
 def is_admin(user):
     if not user.is_authenticated:
         return False
-    return user.is_superuser or user.groups.filter(name="Admin").exists()
+    return user.is_superuser or "Admin" in get_user_roles(user)
 
 
 def is_organizer(user):
-    if not user.is_authenticated:
-        return False
-    return user.groups.filter(name="Organizer").exists()
+    return "Organizer" in get_user_roles(user)
 
 
 def is_participant(user):
-    if not user.is_authenticated:
-        return False
-    return user.groups.filter(name="Participant").exists()
+    return "Participant" in get_user_roles(user)
+
+
+def user_role_flags(user):
+    """The role flags templates branch on, as ``user_roles`` in their context."""
+    return {
+        "is_admin": is_admin(user),
+        "is_organizer": is_organizer(user),
+        "is_participant": is_participant(user),
+    }
 
 
 def is_admin_or_organizer(user):
-    if not user.is_authenticated:
-        return False
-    return user.groups.filter(name__in=["Admin", "Organizer"]).exists()
+    return not get_user_roles(user).isdisjoint({"Admin", "Organizer"})
@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from apps.core.media import hashed_name
+
+logger = logging.getLogger(__name__)
+
+# Encoder settings per derivative format, with the extension each is saved as.
+DERIVATIVE_FORMATS = {
+    "webp": ("webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "jpeg": (
+        "jpg",
+        {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+    ),
+}
+
+MANIFEST_SUFFIX = ".derivatives.json"
+MISSING_MANIFEST_TIMEOUT = 60
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def manifest_name(name):
+    return f"{name}{MANIFEST_SUFFIX}"
+
+
+def _manifest_cache_key(name):
+    return f"images:manifest:{name}"
+
+
+def derivative_widths(width):
+    """The configured widths narrower than ``width``, plus ``width`` itself
+    when it is within range, so images are never scaled up."""
+    widths = [w for w in settings.IMAGE_DERIVATIVE_WIDTHS if w < width]
+    if width <= max(settings.IMAGE_DERIVATIVE_WIDTHS) or not widths:
+        widths.append(width)
+    return widths
+
+
+def _flatten(image):
+    if image.mode in ("RGB", "L"):
+        return image
+    background = Image.new("RGB", image.size, "white")
+    background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+    return background
+
+
+def _save(storage, name, data):
+    # Regenerating must overwrite, not get a new name from the storage.
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(data))
+
+
+def generate_derivatives(name, storage=default_storage):
+    """Write resized WebP and JPEG copies of the image ``name`` next to it,
+    and a manifest listing them, and return the manifest.
+
+    Derivatives are named ``<name without extension>-<width>w.<hash>.<ext>``
+    after their content, so they can be cached indefinitely.
+    """
+    with storage.open(name) as file:
+        original = Image.open(file)
+        original.load()
+    original = ImageOps.exif_transpose(original)
+    width, height = original.size
+    root, _ = os.path.splitext(name)
+
+    derivatives = {fmt: [] for fmt in DERIVATIVE_FORMATS}
+    for target in derivative_widths(width):
+        size = (target, max(1, round(height * target / width)))
+        resized = original.resize(size, Image.LANCZOS)
+        for fmt, (extension, options) in DERIVATIVE_FORMATS.items():
+            buffer = BytesIO()
+            image = resized if fmt == "webp" else _flatten(resized)
+            image.save(buffer, **options)
+            data = buffer.getvalue()
+            saved = _save(
+                storage, hashed_name(f"{root}-{target}w", extension, data), data
+            )
+            derivatives[fmt].append([target, saved])
+
+    manifest = {"width": width, "height": height, "derivatives": derivatives}
+    _save(storage, manifest_name(name), json.dumps(manifest).encode())
+    cache.set(_manifest_cache_key(name), manifest, None)
+    return manifest
+
+
+def get_manifest(name, on_done=None, storage=default_storage):
+    """Return the derivative manifest of ``name``, or None when it has not
+    been generated yet, in which case generation is scheduled with
+    ``on_done``."""
+    key = _manifest_cache_key(name)
+    manifest = cache.get(key)
+    if manifest is None:
+        try:
+            with storage.open(manifest_name(name)) as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            manifest = {}
+            schedule_derivatives(name, on_done)
+        cache.set(key, manifest, None if manifest else MISSING_MANIFEST_TIMEOUT)
+    return manifest or None
+
+
+def _executor_instance():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_DERIVATIVE_WORKERS,
+                thread_name_prefix="image-derivatives",
+            )
+        return _executor
+
+
+def _run(name, on_done):
+    try:
+        generate_derivatives(name)
+        if on_done:
+            on_done()
+    except Exception:
+        logger.exception("Could not generate derivatives of %s", name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def _submit(name, on_done):
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    _executor_instance().submit(_run, name, on_done)
+
+
+def schedule_derivatives(name, on_done=None):
+    """Generate the derivatives of ``name`` in the background thread pool
+    once the current transaction commits, then call ``on_done``.
+
+    Names already queued in this process are skipped.
+    """
+    if name:
+        transaction.on_commit(lambda: _submit(name, on_done))
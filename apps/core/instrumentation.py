@@ -0,0 +1,93 @@
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as BaseTemplate
+from django.template.backends.django import reraise
+
+
+@dataclass
+class RequestMetrics:
+    view_name: str | None = None
+    query_budget: int | None = None
+    queries: int = 0
+    db_time: float = 0.0
+    template_time: float = 0.0
+    total_time: float = 0.0
+
+
+current_metrics: ContextVar[RequestMetrics | None] = ContextVar(
+    "current_metrics", default=None
+)
+
+
+_record_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(limit):
+    """Declare the most SQL queries a function-based view may run per request.
+
+    Class-based views set a ``query_budget`` attribute instead.
+    """
+
+    def decorator(view_func):
+        view_func.query_budget = limit
+        return view_func
+
+    return decorator
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request's
+    metrics. It is a no-op outside a request."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        # Async views run a request's queries on several threads at once.
+        with _record_lock:
+            metrics.queries += 1
+            metrics.db_time += elapsed
+
+
+class Template(BaseTemplate):
+    def render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class DjangoTemplatesWithTiming(DjangoTemplates):
+    """The Django template backend, adding render time to the current
+    request's metrics.
+
+    Only top-level renders go through the backend, so ``{% include %}`` and
+    ``{% extends %}`` are counted once, as part of the page that uses them.
+    """
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.metrics import EMAILS_SENT
+from apps.core.models import OutboxEmail
+
+# How long a claimed batch stays invisible to other workers before it is
+# considered abandoned and picked up again.
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def enqueue_mail(subject, message, recipient_list, from_email=None):
+    """Store an email in the outbox as part of the current transaction.
+
+    The row is only visible to the delivery worker once the transaction
+    commits, and disappears with it on rollback.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or "",
+        recipients=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+def claim_batch(batch_size):
+    now = timezone.now()
+
+    with transaction.atomic():
+        due = OutboxEmail.objects.filter(
+            status=OutboxEmail.PENDING, next_attempt_at__lte=now
+        ).order_by("next_attempt_at")
+        if transaction.get_connection().features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+
+        batch = list(due[:batch_size])
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            next_attempt_at=now + CLAIM_LEASE
+        )
+    return batch
+
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.DEAD
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+
+
+def _record_success(email):
+    email.attempts += 1
+    email.status = OutboxEmail.SENT
+    email.sent_at = timezone.now()
+
+
+def deliver(batch):
+    """Send a claimed batch over one email connection.
+
+    Returns ``(sent, failed, dead)`` counts.
+    """
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        for email in batch:
+            _record_failure(email, e)
+    else:
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    email.subject,
+                    email.body,
+                    email.from_email or None,
+                    email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as e:
+                    _record_failure(email, e)
+                else:
+                    _record_success(email)
+        finally:
+            connection.close()
+
+    OutboxEmail.objects.bulk_update(
+        batch, ["attempts", "status", "next_attempt_at", "last_error", "sent_at"]
+    )
+
+    sent = sum(email.status == OutboxEmail.SENT for email in batch)
+    dead = sum(email.status == OutboxEmail.DEAD for email in batch)
+    failed = len(batch) - sent - dead
+
+    EMAILS_SENT.inc(sent, source="outbox", outcome="sent")
+    EMAILS_SENT.inc(failed, source="outbox", outcome="retry")
+    EMAILS_SENT.inc(dead, source="outbox", outcome="dead")
+    return sent, failed, dead
@@ -0,0 +1,171 @@
+import json
+import platform
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+
+from apps.core.bench import ROLES, bench_urls, compare, measure, role_clients, seed
+
+BENCH_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bench",
+    }
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and GET every core, events and "
+        "accounts URL as each role, reporting latency percentiles, SQL query "
+        "counts and response size per view."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--events", type=int, default=2000)
+        parser.add_argument(
+            "--rsvps-per-user",
+            type=int,
+            default=10,
+            help="Number of events each participant has RSVPed to.",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Measured requests per URL and role.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=2,
+            help="Unmeasured requests per URL and role, run first.",
+        )
+        parser.add_argument(
+            "--role",
+            action="append",
+            choices=ROLES,
+            help="Only bench as this role. Can be repeated.",
+        )
+        parser.add_argument(
+            "--url",
+            action="append",
+            help="Only bench URLs whose name contains this text. Can be repeated.",
+        )
+        parser.add_argument(
+            "--output",
+            default="bench.json",
+            help="File to write the results to.",
+        )
+        parser.add_argument(
+            "--compare",
+            metavar="BASELINE",
+            help="Results file from another run. Exit with an error when a view "
+            "runs more queries or its p95 is slower than --tolerance allows.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed p95 slowdown against --compare, as a fraction.",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        if settings.DEBUG:
+            self.stderr.write(
+                "DEBUG is on, so the debug toolbar and reloader middleware are "
+                "part of every timing."
+            )
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(CACHES=BENCH_CACHES):
+                results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "volumes": {
+                key: options[key]
+                for key in ("users", "categories", "events", "rsvps_per_user")
+            },
+            "iterations": options["iterations"],
+            "warmup": options["warmup"],
+            "results": results,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Wrote {len(results)} results to {options['output']}.")
+
+        if options["compare"]:
+            self.compare(results, options["compare"], options["tolerance"])
+
+    def run(self, options):
+        self.stdout.write(
+            f"Seeding {options['users']} users, {options['categories']} "
+            f"categories, {options['events']} events..."
+        )
+        fixtures = seed(
+            options["users"],
+            options["categories"],
+            options["events"],
+            options["rsvps_per_user"],
+        )
+        clients = role_clients(fixtures)
+        roles = options["role"] or ROLES
+        urls = [
+            (name, path)
+            for name, path in bench_urls(fixtures)
+            if not options["url"] or any(part in name for part in options["url"])
+        ]
+
+        self.stdout.write(
+            f"{'role':<12} {'url':<36} {'status':>6} {'queries':>7} "
+            f"{'bytes':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+        )
+        results = []
+        for name, path in urls:
+            for role in roles:
+                result = {
+                    "role": role,
+                    "url": name,
+                    "path": path,
+                    **measure(
+                        clients[role], path, options["iterations"], options["warmup"]
+                    ),
+                }
+                results.append(result)
+                self.stdout.write(
+                    f"{role:<12} {name:<36} {result['status']:>6} "
+                    f"{result['queries']:>7} {result['bytes']:>8} "
+                    f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                    f"{result['p99_ms']:>8.2f}"
+                )
+        return results
+
+    def compare(self, results, path, tolerance):
+        with open(path) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, tolerance)
+        for line in regressions:
+            self.stderr.write(line)
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) against {path}.")
+        self.stdout.write(f"No regressions against {path}.")
@@ -0,0 +1,141 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.bench import compare, measure_http, session_cookie
+
+User = get_user_model()
+
+DEFAULT_URLS = ("events:dashboard", "events:view-all", "events:rsvp-view")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a running server over HTTP with concurrent requests as one "
+        "user, reporting latency percentiles, throughput and SQL query "
+        "counts per URL. Run it against the same server started with "
+        "ASYNC_VIEWS off and on to compare the sync and async views."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "base_url",
+            nargs="?",
+            default="http://127.0.0.1:8000",
+            help="Address of the server, which must use this database.",
+        )
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="Username to send the requests as.",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            help="Path to request. Can be repeated. Defaults to the dashboard, "
+            "event list and RSVP list.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Measured requests per path.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Requests in flight at once.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=20,
+            help="Unmeasured requests per path, sent first.",
+        )
+        parser.add_argument(
+            "--label",
+            default="",
+            help="Name for this run in the results, such as sync or async.",
+        )
+        parser.add_argument(
+            "--output",
+            default="bench-http.json",
+            help="File to write the results to.",
+        )
+        parser.add_argument(
+            "--compare",
+            metavar="BASELINE",
+            help="Results file from another run. Exit with an error when a path "
+            "runs more queries or its p95 is slower than --tolerance allows.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed p95 slowdown against --compare, as a fraction.",
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be at least 1.")
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}.")
+
+        cookie = session_cookie(user)
+        paths = options["path"] or [reverse(name) for name in DEFAULT_URLS]
+
+        self.stdout.write(
+            f"{'path':<36} {'status':>6} {'queries':>7} {'req/s':>8} "
+            f"{'p50':>8} {'p95':>8} {'p99':>8}"
+        )
+        results = []
+        for path in paths:
+            result = {
+                "role": user.username,
+                "url": path,
+                **measure_http(
+                    options["base_url"],
+                    path,
+                    cookie,
+                    options["requests"],
+                    options["concurrency"],
+                    options["warmup"],
+                ),
+            }
+            results.append(result)
+            self.stdout.write(
+                f"{path:<36} {result['status']:>6} {result['queries']:>7} "
+                f"{result['requests_per_s']:>8.1f} {result['p50_ms']:>8.2f} "
+                f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+            )
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "label": options["label"],
+            "base_url": options["base_url"],
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "warmup": options["warmup"],
+            "results": results,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Wrote {len(results)} results to {options['output']}.")
+
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)
+            regressions = compare(results, baseline, options["tolerance"])
+            for line in regressions:
+                self.stderr.write(line)
+            if regressions:
+                raise CommandError(
+                    f"{len(regressions)} regression(s) against {options['compare']}."
+                )
+            self.stdout.write(f"No regressions against {options['compare']}.")
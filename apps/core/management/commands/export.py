@@ -0,0 +1,52 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.exports import export_users
+from apps.core.exports import FORMATS, write_export
+from apps.events.exports import export_attendees, export_events
+from apps.events.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream events, the attendees of one event, or users as CSV or NDJSON "
+        "to a file or stdout, optionally gzipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=("events", "rsvps", "users"))
+        parser.add_argument(
+            "--event",
+            type=int,
+            help="Event id whose RSVPs to export. Required for rsvps.",
+        )
+        parser.add_argument("--format", choices=tuple(FORMATS), default="csv")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument(
+            "--output",
+            help="File to write to. Defaults to stdout.",
+        )
+
+    def handle(self, *args, **options):
+        dataset = options["dataset"]
+        if dataset == "events":
+            header, rows = export_events()
+        elif dataset == "users":
+            header, rows = export_users()
+        else:
+            event_id = options["event"]
+            if event_id is None:
+                raise CommandError("--event is required to export rsvps.")
+            if not Event.objects.filter(id=event_id).exists():
+                raise CommandError(f"Event {event_id} does not exist.")
+            header, rows = export_attendees(event_id)
+
+        if options["output"]:
+            with open(options["output"], "wb") as file:
+                write_export(file, header, rows, options["format"], options["gzip"])
+        else:
+            write_export(
+                sys.stdout.buffer, header, rows, options["format"], options["gzip"]
+            )
+            sys.stdout.buffer.flush()
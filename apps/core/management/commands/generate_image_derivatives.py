@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.core.images import generate_derivatives, manifest_name
+from apps.events.cards import bump_category_version
+from apps.events.models import Category, Event
+from apps.events.page_cache import bump_listing_version
+
+User = get_user_model()
+
+DEFAULT_IMAGES = ("events/default.jpg", "profile/default.jpg")
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the resized WebP/JPEG copies of the default images and of "
+        "every event and profile image that does not have them yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate images that already have derivatives.",
+        )
+
+    def handle(self, *args, **options):
+        names = set(DEFAULT_IMAGES)
+        names.update(Event.objects.exclude(image="").values_list("image", flat=True))
+        names.update(
+            User.objects.exclude(profile_image="").values_list(
+                "profile_image", flat=True
+            )
+        )
+        if not options["force"]:
+            names = {
+                name
+                for name in names
+                if not default_storage.exists(manifest_name(name))
+            }
+
+        generated = failed = 0
+        with ThreadPoolExecutor(settings.IMAGE_DERIVATIVE_WORKERS) as executor:
+            futures = {
+                name: executor.submit(generate_derivatives, name)
+                for name in sorted(names)
+                if default_storage.exists(name)
+            }
+            for name, future in futures.items():
+                try:
+                    future.result()
+                    generated += 1
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f"{name}: {error}")
+
+        if generated:
+            for category_id in Category.objects.values_list("id", flat=True):
+                bump_category_version(category_id)
+            bump_category_version(None)
+            bump_listing_version()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated derivatives for {generated} images, {failed} failed."
+            )
+        )
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.mail import claim_batch, deliver
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help="Number of emails to send over one connection.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5,
+            help="Seconds to wait when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no email is due instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            batch = claim_batch(options["batch_size"])
+
+            if batch:
+                sent, failed, dead = deliver(batch)
+                self.stdout.write(
+                    f"Sent {sent}, will retry {failed}, dead-lettered {dead}."
+                )
+                continue
+
+            if options["once"]:
+                break
+            time.sleep(options["poll_interval"])
@@ -0,0 +1,177 @@
+import hashlib
+import mimetypes
+import os
+import re
+import stat as stat_module
+import threading
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage, default_storage
+
+# Names like ``events/photo-640w.3f9a1c0b7e2d.webp`` embed a hash of their
+# content, so they can be cached by clients for good.
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$")
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def hashed_name(stem, extension, content):
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}.{extension}"
+
+
+def is_hashed_name(name):
+    return bool(HASHED_NAME.search(name))
+
+
+@dataclass(frozen=True)
+class MediaFile:
+    path: str
+    size: int
+    mtime_ns: int
+    etag: str
+    content_type: str
+
+    @property
+    def modified(self):
+        return self.mtime_ns // 1_000_000_000
+
+
+def _digest(path):
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()[:32]
+
+
+class MediaIndex:
+    """The size, modification time, content type and content-hash ETag of
+    each media file served so far.
+
+    Files are hashed once: the ETag is also stored in the cache under the
+    file's size and mtime, so other workers reuse it. Every lookup stats the
+    file, and an entry whose size or mtime no longer matches is rebuilt, so
+    files replaced behind the storage's back are never served stale.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _build(self, name, path, stat):
+        key = f"media:etag:{name}:{stat.st_size}:{stat.st_mtime_ns}"
+        etag = cache.get(key)
+        if etag is None:
+            etag = f'"{_digest(path)}"'
+            cache.set(key, etag, None)
+        content_type, encoding = mimetypes.guess_type(name)
+        if encoding:
+            content_type = None
+        return MediaFile(
+            path,
+            stat.st_size,
+            stat.st_mtime_ns,
+            etag,
+            content_type or "application/octet-stream",
+        )
+
+    def get(self, name):
+        """Return the MediaFile for ``name``, or None if there is no such
+        file. Raises SuspiciousFileOperation for names outside the root."""
+        path = self.storage.path(name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.remove(name)
+            return None
+        if not stat_module.S_ISREG(stat.st_mode):
+            return None
+
+        entry = self._entries.get(name)
+        if (
+            entry is None
+            or entry.size != stat.st_size
+            or entry.mtime_ns != stat.st_mtime_ns
+        ):
+            entry = self._build(name, path, stat)
+            with self._lock:
+                self._entries[name] = entry
+        return entry
+
+    def add(self, name):
+        self.get(name)
+
+    def remove(self, name):
+        with self._lock:
+            self._entries.pop(name, None)
+
+
+class IndexedFileSystemStorage(FileSystemStorage):
+    """File system storage that keeps the media index up to date, so files
+    are hashed when saved rather than on their first request."""
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        if self.location == default_storage.location:
+            media_index.add(name)
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        media_index.remove(name)
+
+
+media_index = MediaIndex(default_storage)
+
+
+def parse_range(header, size):
+    """Return the ``(first, last)`` byte positions a single-range ``Range``
+    header asks for, or None when it should be ignored and the whole file
+    sent. Raises ValueError when the range cannot be satisfied."""
+    match = RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+
+    if not first:
+        if not last:
+            return None
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Empty suffix range.")
+        return max(size - length, 0), size - 1
+
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        raise ValueError("Range starts past the end of the file.")
+    last = min(int(last), size - 1) if last else size - 1
+    return first, last
+
+
+class FileRange:
+    """A file limited to ``length`` bytes from its current position.
+
+    It keeps ``fileno()`` so a WSGI server's ``wsgi.file_wrapper`` can still
+    use sendfile; those servers send at most Content-Length bytes. Without
+    ``tell()``, FileResponse leaves Content-Length to the caller.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,411 @@
+import atexit
+import json
+import math
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Where the counts of processes that have exited are folded into.
+RETIRED_FILE = "retired.json"
+
+
+def metrics_dir():
+    return Path(settings.METRICS_DIR) if settings.METRICS_DIR else None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _file_pid(path):
+    try:
+        return int(path.stem.split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+@contextmanager
+def _locked(directory, exclusive):
+    """Hold a lock on ``directory`` so merging the files of exited processes
+    and reading the files never interleave. No-op without fcntl."""
+    if fcntl is None:
+        yield
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(data, samples, gauges):
+    for name, labels, value in data["samples"]:
+        key = (name, tuple(map(tuple, labels)))
+        samples[key] = samples.get(key, 0) + value
+    for name, labels, value, timestamp in data["gauges"]:
+        key = (name, tuple(map(tuple, labels)))
+        if key not in gauges or timestamp > gauges[key][1]:
+            gauges[key] = (value, timestamp)
+
+
+def _serialize(samples, gauges):
+    return {
+        "samples": [[name, labels, value] for (name, labels), value in samples.items()],
+        "gauges": [
+            [name, labels, value, timestamp]
+            for (name, labels), (value, timestamp) in gauges.items()
+        ],
+    }
+
+
+def _write(path, data):
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(data))
+    os.replace(temporary, path)
+
+
+class Registry:
+    """Process-local metric values, shared between processes through files.
+
+    Each process keeps its samples in memory and writes them to
+    ``METRICS_DIR/<pid>-<token>.json`` at most every
+    ``METRICS_FLUSH_INTERVAL`` seconds; the random token keeps a recycled
+    pid from overwriting the file of the process that had it before.
+    Rendering merges every file in the directory: counters and histograms
+    are summed and gauges take the most recently set value. The files of
+    processes that have exited are folded into ``retired.json`` on each
+    process's first flush and on every render, so their counts are kept
+    without one file per process ever started. Without ``METRICS_DIR`` only
+    the current process is reported.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._name = f"{self._pid}-{secrets.token_hex(4)}.json"
+        self._samples = {}
+        self._gauges = {}
+        self._dirty = False
+        self._timer = None
+        self._flushed = False
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add(self, name, labels, amount):
+        with self._lock:
+            self._check_fork()
+            key = (name, labels)
+            self._samples[key] = self._samples.get(key, 0) + amount
+            self._changed()
+
+    def set(self, name, labels, value):
+        with self._lock:
+            self._check_fork()
+            self._gauges[(name, labels)] = (value, time.time())
+            self._changed()
+
+    def _check_fork(self):
+        # Gunicorn forks workers from the master; a child must not report the
+        # parent's samples as its own.
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def _changed(self):
+        self._dirty = True
+        if self._timer is None and metrics_dir():
+            self._timer = threading.Timer(settings.METRICS_FLUSH_INTERVAL, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        directory = metrics_dir()
+        with self._lock:
+            self._timer = None
+            if not directory or not self._dirty or os.getpid() != self._pid:
+                return
+            data = _serialize(self._samples, self._gauges)
+            self._dirty = False
+            first_flush = not self._flushed
+            self._flushed = True
+
+        directory.mkdir(parents=True, exist_ok=True)
+        _write(directory / self._name, data)
+        if first_flush:
+            self.retire_exited()
+
+    def retire_exited(self):
+        """Fold the files of processes that are no longer running into
+        ``retired.json`` and delete them."""
+        directory = metrics_dir()
+        if not directory or fcntl is None:
+            return
+
+        with _locked(directory, exclusive=True):
+            exited = [
+                path
+                for path in directory.glob("*.json")
+                if path.name not in (RETIRED_FILE, self._name)
+                and (pid := _file_pid(path)) is not None
+                and not _pid_alive(pid)
+            ]
+            if not exited:
+                return
+
+            samples, gauges = {}, {}
+            for path in [directory / RETIRED_FILE, *exited]:
+                data = _read(path)
+                if data:
+                    _merge(data, samples, gauges)
+            _write(directory / RETIRED_FILE, _serialize(samples, gauges))
+            for path in exited:
+                path.unlink(missing_ok=True)
+
+    def collect(self):
+        """Return ``(samples, gauges)`` merged across every process."""
+        directory = metrics_dir()
+        if not directory:
+            with self._lock:
+                return dict(self._samples), {
+                    key: value for key, (value, _) in self._gauges.items()
+                }
+
+        self.flush()
+        self.retire_exited()
+        samples = {}
+        gauges = {}
+        with _locked(directory, exclusive=False):
+            for path in directory.glob("*.json"):
+                data = _read(path)
+                if data:
+                    _merge(data, samples, gauges)
+
+        return samples, {key: value for key, (value, _) in gauges.items()}
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format."""
+        samples, gauges = self.collect()
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render(samples, gauges))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _format_sample(name, labels, value):
+    if labels:
+        pairs = ",".join(
+            '{}="{}"'.format(
+                key,
+                str(label)
+                .replace("\\", r"\\")
+                .replace('"', r"\"")
+                .replace("\n", r"\n"),
+            )
+            for key, label in labels
+        )
+        name = f"{name}{{{pairs}}}"
+    return f"{name} {_format_value(value)}"
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def _labels(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes the labels {self.labelnames}, got {tuple(labels)}."
+            )
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    def _own_samples(self, samples, *names):
+        return sorted((key, value) for key, value in samples.items() if key[0] in names)
+
+    def render(self, samples, gauges):
+        return [
+            _format_sample(name, labels, value)
+            for (name, labels), value in self._own_samples(samples, self.name)
+        ]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        registry.add(self.name, self._labels(labels), amount)
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        registry.set(self.name, self._labels(labels), value)
+
+    def render(self, samples, gauges):
+        return super().render(gauges, {})
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        labels = self._labels(labels)
+        for bound in self.buckets:
+            if value <= bound:
+                registry.add(
+                    f"{self.name}_bucket", labels + (("le", _format_value(bound)),), 1
+                )
+        registry.add(f"{self.name}_sum", labels, value)
+        registry.add(f"{self.name}_count", labels, 1)
+
+    def render(self, samples, gauges):
+        # Buckets are stored cumulatively, one sample per bound the value
+        # fell under, so fill in the bounds no observation reached.
+        lines = []
+        series = {
+            labels
+            for (name, labels), _ in self._own_samples(samples, f"{self.name}_count")
+        }
+        for labels in sorted(series):
+            for bound in self.buckets:
+                bucket = labels + (("le", _format_value(bound)),)
+                lines.append(
+                    _format_sample(
+                        f"{self.name}_bucket",
+                        bucket,
+                        samples.get((f"{self.name}_bucket", bucket), 0),
+                    )
+                )
+            for suffix in ("_sum", "_count"):
+                lines.append(
+                    _format_sample(
+                        f"{self.name}{suffix}",
+                        labels,
+                        samples[(f"{self.name}{suffix}", labels)],
+                    )
+                )
+        return lines
+
+
+class DerivedGauge(Metric):
+    """A gauge computed at render time from the merged samples."""
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, compute):
+        super().__init__(name, documentation)
+        self.compute = compute
+
+    def render(self, samples, gauges):
+        return [
+            _format_sample(self.name, labels, value)
+            for labels, value in sorted(self.compute(samples).items())
+        ]
+
+
+def _cache_hit_ratio(samples):
+    totals = {}
+    for (name, labels), value in samples.items():
+        if name != "cache_requests_total":
+            continue
+        labels = dict(labels)
+        hits, lookups = totals.get(labels["cache"], (0, 0))
+        if labels["result"] == "hit":
+            hits += value
+        totals[labels["cache"]] = (hits, lookups + value)
+
+    return {
+        (("cache", cache_name),): hits / lookups
+        for cache_name, (hits, lookups) in totals.items()
+        if lookups
+    }
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent serving a request, by URL name and status code.",
+    ["view", "status"],
+)
+REQUEST_QUERIES = Counter(
+    "http_request_db_queries_total",
+    "SQL queries run while serving requests, by URL name.",
+    ["view"],
+)
+REQUEST_DB_TIME = Counter(
+    "http_request_db_seconds_total",
+    "Time spent in SQL queries while serving requests, by URL name.",
+    ["view"],
+)
+RSVPS_CREATED = Counter("rsvps_created_total", "RSVPs created.")
+EMAILS_QUEUED = Counter(
+    "emails_queued_total", "Emails added to the outbox, by kind.", ["kind"]
+)
+EMAILS_SENT = Counter(
+    "emails_sent_total",
+    "Email delivery attempts, by sender and outcome.",
+    ["source", "outcome"],
+)
+EMAIL_OUTBOX_PENDING = Gauge(
+    "email_outbox_pending", "Emails waiting in the outbox, as of the last scrape."
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups, by cache and result.", ["cache", "result"]
+)
+CACHE_HIT_RATIO = DerivedGauge(
+    "cache_hit_ratio", "Share of cache lookups that were hits.", _cache_hit_ratio
+)
@@ -0,0 +1,12 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from apps.core.instrumentation import record_query
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # Every connection, including those opened by worker threads, reports
+    # its queries to whichever request's metrics are current.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,64 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from apps.core.images import get_manifest
+
+register = template.Library()
+
+
+def _srcset(derivatives):
+    return ", ".join(
+        f"{default_storage.url(name)} {width}w" for width, name in derivatives
+    )
+
+
+@register.simple_tag
+def responsive_image(image, alt="", css_class="", sizes="100vw", loading="lazy"):
+    """Render ``image`` (a file field or storage name) as a ``<picture>``
+    offering its WebP and JPEG derivatives through ``srcset``.
+
+    Until the derivatives exist, a plain ``<img>`` of the original is
+    rendered and their generation is scheduled.
+    """
+    name = getattr(image, "name", image)
+    if not name:
+        return ""
+
+    manifest = get_manifest(name)
+    if manifest is None:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async" />',
+            default_storage.url(name),
+            alt,
+            css_class,
+            loading,
+        )
+
+    derivatives = manifest["derivatives"]
+    jpeg = derivatives["jpeg"]
+    # Browsers without srcset support get the largest JPEG up to 640px wide.
+    fallback = max((d for d in jpeg if d[0] <= 640), default=jpeg[0])
+    sources = format_html_join(
+        "",
+        '<source type="image/{}" srcset="{}" sizes="{}" />',
+        (
+            (fmt, _srcset(entries), sizes)
+            for fmt, entries in derivatives.items()
+            if fmt != "jpeg"
+        ),
+    )
+    return format_html(
+        '<picture class="block">{}<img src="{}" srcset="{}" sizes="{}" '
+        'width="{}" height="{}" alt="{}" class="{}" loading="{}" '
+        'decoding="async" /></picture>',
+        sources,
+        default_storage.url(fallback[1]),
+        _srcset(jpeg),
+        sizes,
+        manifest["width"],
+        manifest["height"],
+        alt,
+        css_class,
+        loading,
+    )
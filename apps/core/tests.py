@@ -1,3 +1,475 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from io import BytesIO, StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from PIL import Image
+
+from apps.core.helpers import bump_cache_version, cache_version, get_user_roles
+from apps.core.images import generate_derivatives, get_manifest, manifest_name
+from apps.core.mail import enqueue_mail
+from apps.core.media import hashed_name
+from apps.core.metrics import RETIRED_FILE, Registry
+from apps.core.models import OutboxEmail
+
+User = get_user_model()
+
+
+class FailingEmailBackend(EmailBackend):
+    """Locmem backend that refuses messages to addresses at fail.test."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(address.endswith("@fail.test") for address in message.to):
+                raise ConnectionError("Mailbox unavailable")
+        return super().send_messages(messages)
+
+
+class CacheVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_version_is_stable_until_bumped(self):
+        version = cache_version("tests:version")
+        self.assertEqual(cache_version("tests:version"), version)
+
+        bump_cache_version("tests:version")
+        bumped = cache_version("tests:version")
+        self.assertNotEqual(bumped, version)
+
+        bump_cache_version("tests:version")
+        self.assertNotIn(cache_version("tests:version"), (version, bumped))
+
+    def test_bump_without_version(self):
+        bump_cache_version("tests:missing")
+        self.assertIsNotNone(cache.get("tests:missing"))
+
+
+class RoleCacheTests(TestCase):
+    """Roles are shared between requests through the cache, and every way
+    group membership or a group itself can change invalidates them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admins = Group.objects.create(name="Admin")
+        cls.organizers = Group.objects.create(name="Organizer")
+        cls.participants = Group.objects.get_or_create(name="Participant")[0]
+        cls.admin = User.objects.create(username="admin")
+        cls.admin.groups.set([cls.admins])
+        cls.user = User.objects.create(username="user")
+        cls.user.groups.set([cls.organizers])
+
+    def setUp(self):
+        cache.clear()
+
+    def roles(self, user):
+        # A fresh instance, as the next request would load.
+        return get_user_roles(User.objects.get(pk=user.pk))
+
+    def role_queries(self, queries):
+        return [query for query in queries if "auth_group" in query["sql"]]
+
+    def test_later_requests_read_roles_from_the_cache(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(reverse("core:home"))
+        with CaptureQueriesContext(connection) as second:
+            self.client.get(reverse("core:home"))
+        self.assertEqual(len(self.role_queries(first)), 1)
+        self.assertEqual(self.role_queries(second), [])
+
+    def test_assign_role(self):
+        self.assertEqual(self.roles(self.user), {"Organizer"})
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("accounts:assign-role", args=[self.user.pk]),
+            {"role": self.participants.pk},
+        )
+        self.assertRedirects(
+            response, reverse("accounts:user-list"), fetch_redirect_response=False
+        )
+        self.assertEqual(self.roles(self.user), {"Participant"})
+
+    def test_reverse_membership_changes(self):
+        other = User.objects.create(username="other")
+        self.assertEqual(self.roles(self.user), {"Organizer"})
+        self.assertEqual(self.roles(other), {"Participant"})
+
+        self.admins.user_set.add(self.user)
+        self.assertEqual(self.roles(self.user), {"Admin", "Organizer"})
+
+        self.organizers.user_set.remove(self.user)
+        self.assertEqual(self.roles(self.user), {"Admin"})
+
+        self.participants.user_set.clear()
+        self.assertEqual(self.roles(other), set())
+
+    def test_renamed_or_deleted_group(self):
+        user_list = reverse("accounts:user-list")
+        no_permission = reverse("core:no-permission")
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(user_list).status_code, 200)
+
+        self.admins.name = "Former admins"
+        self.admins.save()
+        self.assertRedirects(
+            self.client.get(user_list), no_permission, fetch_redirect_response=False
+        )
+
+        self.admins.name = "Admin"
+        self.admins.save()
+        self.assertEqual(self.client.get(user_list).status_code, 200)
+
+        self.admins.delete()
+        self.assertRedirects(
+            self.client.get(user_list), no_permission, fetch_redirect_response=False
+        )
+
+
+class OutboxTests(TestCase):
+    def send_outbox(self):
+        call_command("send_outbox", "--once", stdout=StringIO())
+
+    def test_queued_with_the_transaction(self):
+        with transaction.atomic():
+            User.objects.create(username="kept", email="kept@example.com")
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                User.objects.create(username="dropped", email="dropped@example.com")
+                self.assertTrue(
+                    OutboxEmail.objects.filter(recipients=["dropped@example.com"])
+                )
+                raise RuntimeError
+
+        self.assertEqual(
+            list(OutboxEmail.objects.values_list("recipients", flat=True)),
+            [["kept@example.com"]],
+        )
+        self.assertEqual(mail.outbox, [])
+
+    def test_send_outbox(self):
+        enqueue_mail("Hello", "Body", ["one@example.com"], "from@example.com")
+        enqueue_mail("Hello", "Body", ["two@example.com"])
+
+        self.send_outbox()
+
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["one@example.com", "two@example.com"],
+        )
+        for email in OutboxEmail.objects.all():
+            self.assertEqual(email.status, OutboxEmail.SENT)
+            self.assertEqual(email.attempts, 1)
+            self.assertIsNotNone(email.sent_at)
+
+        self.send_outbox()
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(
+        EMAIL_BACKEND="apps.core.tests.FailingEmailBackend",
+        EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+    )
+    def test_failures_are_retried_then_dead_lettered(self):
+        enqueue_mail("Hello", "Body", ["ok@example.com"])
+        failing = enqueue_mail("Hello", "Body", ["nobody@fail.test"])
+
+        self.send_outbox()
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, OutboxEmail.PENDING)
+        self.assertEqual(failing.attempts, 1)
+        self.assertIn("Mailbox unavailable", failing.last_error)
+        self.assertGreater(failing.next_attempt_at, timezone.now())
+        self.assertEqual([message.to for message in mail.outbox], [["ok@example.com"]])
+
+        # Not due yet, so a second run leaves it alone.
+        self.send_outbox()
+        failing.refresh_from_db()
+        self.assertEqual(failing.attempts, 1)
+
+        OutboxEmail.objects.filter(pk=failing.pk).update(next_attempt_at=timezone.now())
+        self.send_outbox()
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, OutboxEmail.DEAD)
+        self.assertEqual(failing.attempts, 2)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write_process_file(self, pid, value):
+        data = {"samples": [["jobs_total", [], value]], "gauges": []}
+        (self.directory / f"{pid}-0000.json").write_text(json.dumps(data))
+
+    def exited_pid(self):
+        process = subprocess.Popen([sys.executable, "-c", ""])
+        process.wait()
+        return process.pid
+
+    def test_exited_processes_are_retired(self):
+        with self.settings(METRICS_DIR=self.directory):
+            self.write_process_file(self.exited_pid(), 2)
+            self.write_process_file(self.exited_pid(), 3)
+            self.write_process_file(os.getppid(), 5)
+            registry = Registry()
+            registry.add("jobs_total", (), 1)
+
+            samples, _ = registry.collect()
+            self.assertEqual(samples[("jobs_total", ())], 11)
+            self.assertEqual(
+                sorted(path.name for path in self.directory.glob("*.json")),
+                sorted([RETIRED_FILE, f"{os.getppid()}-0000.json", registry._name]),
+            )
+
+            self.write_process_file(self.exited_pid(), 4)
+            samples, _ = registry.collect()
+            self.assertEqual(samples[("jobs_total", ())], 15)
+
+    def test_recycled_pid_keeps_both_files(self):
+        with self.settings(METRICS_DIR=self.directory):
+            first, second = Registry(), Registry()
+            first.add("jobs_total", (), 1)
+            second.add("jobs_total", (), 2)
+            first.flush()
+            second.flush()
+
+            self.assertEqual(len(list(self.directory.glob("*.json"))), 2)
+            self.assertEqual(second.collect()[0][("jobs_total", ())], 3)
+
+    @override_settings(METRICS_TOKEN="", DEBUG=False)
+    def test_closed_without_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="", DEBUG=True)
+    def test_open_when_debugging(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="secret", DEBUG=False)
+    def test_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get(
+            "/metrics", headers={"Authorization": "Bearer secret"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"# TYPE cache_requests_total counter", response.content)
+
+
+@override_settings(IMAGE_DERIVATIVE_WIDTHS=(160, 320, 640))
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def save_image(self, name, size, mode="RGB"):
+        buffer = BytesIO()
+        Image.new(mode, size, "red").save(buffer, format="PNG")
+        name = default_storage.save(name, ContentFile(buffer.getvalue()))
+        self.addCleanup(default_storage.delete, name)
+        return name
+
+    def cleanup_derivatives(self, manifest, name):
+        for entries in manifest["derivatives"].values():
+            for _, derivative in entries:
+                self.addCleanup(default_storage.delete, derivative)
+        self.addCleanup(default_storage.delete, manifest_name(name))
+
+    def test_generate_derivatives(self):
+        name = self.save_image("tests/photo.png", (800, 400), mode="RGBA")
+        manifest = generate_derivatives(name)
+        self.cleanup_derivatives(manifest, name)
+
+        self.assertEqual((manifest["width"], manifest["height"]), (800, 400))
+        for fmt, extension in (("webp", "webp"), ("jpeg", "jpg")):
+            entries = manifest["derivatives"][fmt]
+            self.assertEqual([width for width, _ in entries], [160, 320, 640])
+            for width, derivative in entries:
+                self.assertRegex(
+                    derivative, rf"^tests/photo-{width}w\.[0-9a-f]{{12}}\.{extension}$"
+                )
+                with default_storage.open(derivative) as file:
+                    image = Image.open(file)
+                    self.assertEqual(image.size, (width, width // 2))
+                    self.assertEqual(image.format, fmt.upper())
+
+    def test_small_images_are_not_scaled_up(self):
+        name = self.save_image("tests/icon.png", (100, 50))
+        manifest = generate_derivatives(name)
+        self.cleanup_derivatives(manifest, name)
+        self.assertEqual([w for w, _ in manifest["derivatives"]["jpeg"]], [100])
+
+    def test_manifest(self):
+        name = self.save_image("tests/photo.png", (400, 400))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertIsNone(get_manifest(name))
+        self.assertEqual(len(callbacks), 1)
+
+        manifest = generate_derivatives(name)
+        self.cleanup_derivatives(manifest, name)
+        self.assertEqual(get_manifest(name), manifest)
+
+        # Read back from the manifest file once the cache has lost it.
+        cache.clear()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(get_manifest(name), manifest)
+        self.assertEqual(callbacks, [])
+
+    def render(self, image):
+        return Template(
+            "{% load images %}{% responsive_image image alt='Photo' sizes='50vw' %}"
+        ).render(Context({"image": image}))
+
+    def test_responsive_image(self):
+        name = self.save_image("tests/photo.png", (800, 400))
+        with self.captureOnCommitCallbacks():
+            html = self.render(name)
+        self.assertHTMLEqual(
+            html,
+            f'<img src="/media/{name}" alt="Photo" class="" loading="lazy" '
+            'decoding="async">',
+        )
+
+        manifest = generate_derivatives(name)
+        self.cleanup_derivatives(manifest, name)
+        html = self.render(name)
+
+        webp = ", ".join(
+            f"/media/{derivative} {width}w"
+            for width, derivative in manifest["derivatives"]["webp"]
+        )
+        jpeg = manifest["derivatives"]["jpeg"]
+        self.assertHTMLEqual(
+            html,
+            '<picture class="block">'
+            f'<source type="image/webp" srcset="{webp}" sizes="50vw">'
+            f'<img src="/media/{jpeg[-1][1]}" '
+            f'srcset="{", ".join(f"/media/{n} {w}w" for w, n in jpeg)}" '
+            'sizes="50vw" width="800" height="400" alt="Photo" class="" '
+            'loading="lazy" decoding="async"></picture>',
+        )
+        self.assertEqual(self.render(""), "")
+
+
+class MediaViewTests(TestCase):
+    CONTENT = b"0123456789abcdef"
+
+    def setUp(self):
+        cache.clear()
+        self.name = self.save("tests/notes.txt", self.CONTENT)
+
+    def save(self, name, content):
+        name = default_storage.save(name, ContentFile(content))
+        self.addCleanup(default_storage.delete, name)
+        return name
+
+    def get(self, name=None, method="get", **headers):
+        url = f"/media/{name or self.name}"
+        return getattr(self.client, method)(url, **headers)
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_get(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.CONTENT)
+        self.assertEqual(response["Content-Length"], str(len(self.CONTENT)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertRegex(response["ETag"], r'^"[0-9a-f]{32}"$')
+        self.assertIn("Last-Modified", response)
+
+    def test_head(self):
+        response = self.get(method="head")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Content-Length"], str(len(self.CONTENT)))
+
+    def test_hashed_names_are_immutable(self):
+        name = self.save(hashed_name("tests/notes", "txt", self.CONTENT), self.CONTENT)
+        self.assertEqual(
+            self.get(name)["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+
+    def test_conditional_get(self):
+        response = self.get()
+        etag, modified = response["ETag"], response["Last-Modified"]
+
+        not_modified = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], etag)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=modified).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=http_date(0)).status_code, 200)
+
+    def test_etag_follows_content(self):
+        etag = self.get()["ETag"]
+        with open(default_storage.path(self.name), "wb") as file:
+            file.write(b"changed")
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.body(response), b"changed")
+
+    def test_ranges(self):
+        size = len(self.CONTENT)
+        for header, first, last in [
+            ("bytes=2-5", 2, 5),
+            ("bytes=10-", 10, size - 1),
+            ("bytes=-3", size - 3, size - 1),
+            ("bytes=4-1000", 4, size - 1),
+        ]:
+            with self.subTest(header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(self.body(response), self.CONTENT[first : last + 1])
+                self.assertEqual(
+                    response["Content-Range"], f"bytes {first}-{last}/{size}"
+                )
+                self.assertEqual(response["Content-Length"], str(last - first + 1))
+
+    def test_unsatisfiable_and_ignored_ranges(self):
+        response = self.get(HTTP_RANGE="bytes=100-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.CONTENT)}")
+
+        for header in ("bytes=5-2", "bytes=0-1,4-5", "lines=1-2"):
+            with self.subTest(header):
+                self.assertEqual(self.get(HTTP_RANGE=header).status_code, 200)
+
+    def test_if_range(self):
+        etag = self.get()["ETag"]
+        self.assertEqual(
+            self.get(HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE=etag).status_code, 206
+        )
+        response = self.get(HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.CONTENT)
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self.get("tests/missing.txt").status_code, 404)
+        self.assertEqual(self.get("../config/settings.py").status_code, 404)
+        self.assertEqual(self.get("tests").status_code, 404)
+        self.assertEqual(self.client.post(f"/media/{self.name}").status_code, 405)
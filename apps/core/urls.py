@@ -1,9 +1,10 @@
 from django.urls import path
 
-from .views import home_view, no_permission
+from .views import home_view, metrics_view, no_permission
 
 app_name = "core"
 urlpatterns = [
     path("", home_view, name="home"),
     path("no-permission/", no_permission, name="no-permission"),
+    path("metrics", metrics_view, name="metrics"),
 ]
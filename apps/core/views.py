@@ -1,9 +1,117 @@
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
 
+from apps.core.instrumentation import query_budget
+from apps.core.media import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    FileRange,
+    is_hashed_name,
+    media_index,
+    parse_range,
+)
+from apps.core.metrics import EMAIL_OUTBOX_PENDING, registry
+from apps.core.models import OutboxEmail
 
+
+@query_budget(3)
 def home_view(request):
     return render(request, "home.html")
 
 
 def no_permission(request):
     return render(request, "no-permission.html")
+
+
+def metrics_view(request):
+    if settings.METRICS_TOKEN:
+        if not constant_time_compare(
+            request.headers.get("Authorization", ""),
+            f"Bearer {settings.METRICS_TOKEN}",
+        ):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+
+    EMAIL_OUTBOX_PENDING.set(
+        OutboxEmail.objects.filter(status=OutboxEmail.PENDING).count()
+    )
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _if_range_matches(request, media):
+    value = request.headers.get("If-Range")
+    if value is None:
+        return True
+    if value.startswith('"'):
+        return value == media.etag
+    return parse_http_date_safe(value) == media.modified
+
+
+def _media_response(request, media):
+    byte_range = None
+    if "Range" in request.headers and _if_range_matches(request, media):
+        try:
+            byte_range = parse_range(request.headers["Range"], media.size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{media.size}"
+            return response
+
+    first, last = byte_range or (0, media.size - 1)
+    length = last - first + 1
+    status = 206 if byte_range else 200
+
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=media.content_type, status=status)
+    else:
+        try:
+            file = open(media.path, "rb")
+        except FileNotFoundError:
+            raise Http404
+        file.seek(first)
+        response = FileResponse(
+            FileRange(file, length), content_type=media.content_type, status=status
+        )
+
+    response["Content-Length"] = length
+    if byte_range:
+        response["Content-Range"] = f"bytes {first}-{last}/{media.size}"
+    return response
+
+
+@require_safe
+def media_view(request, path):
+    """Serve a file from MEDIA_ROOT with validators, ranges and sendfile.
+
+    Conditional requests are answered from the media index without opening
+    the file. Bodies go out through FileResponse, which WSGI servers with
+    ``wsgi.file_wrapper`` send with sendfile. Content-hashed names are
+    marked immutable; everything else must be revalidated.
+    """
+    try:
+        media = media_index.get(path)
+    except SuspiciousFileOperation:
+        media = None
+    if media is None:
+        raise Http404
+
+    response = get_conditional_response(
+        request, etag=media.etag, last_modified=media.modified
+    ) or _media_response(request, media)
+
+    response["ETag"] = media.etag
+    response["Last-Modified"] = http_date(media.modified)
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = (
+        IMMUTABLE_CACHE_CONTROL if is_hashed_name(path) else REVALIDATE_CACHE_CONTROL
+    )
+    return response
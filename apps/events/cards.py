@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.timesince import timesince
+
+from apps.core.helpers import bump_cache_version, cache_version, is_participant
+from apps.core.metrics import CACHE_REQUESTS
+
+CARD_TEMPLATE = "partials/event-card.html"
+
+# Rendered into the cached HTML in place of values that differ per visitor or
+# drift during the day, and swapped for the real values on every read.
+CSRF_SENTINEL = "csrf-token-sentinel-7d41"
+CREATED_SINCE_SENTINEL = "created-since-sentinel-7d41"
+
+
+def category_version_key(category_id):
+    return f"events:category-version:{category_id}"
+
+
+def bump_category_version(category_id):
+    key = category_version_key(category_id)
+    bump_cache_version(key)
+    transaction.on_commit(lambda: bump_cache_version(key))
+
+
+def _category_versions(events):
+    keys = {category_version_key(event.category_id) for event in events}
+    versions = cache.get_many(keys)
+    for key in keys - versions.keys():
+        versions[key] = cache_version(key)
+    return versions
+
+
+def card_cache_key(event, category_version, today, participant):
+    return (
+        f"events:card:{event.pk}:{event.last_modified.timestamp()}:"
+        f"{event.category_id}:{category_version}:{today.isoformat()}:{participant:d}"
+    )
+
+
+def render_event_cards(request, events, today):
+    """Return the rendered dashboard card for each event, in order.
+
+    Cards are cached per event, keyed on its last_modified, its category's
+    version, the local date (for the Today/Upcoming/Past badge) and whether
+    the viewer gets the RSVP button. All cards for a page are fetched with
+    one ``get_many``, and only the misses are rendered.
+    """
+    events = list(events)
+    participant = is_participant(request.user)
+    versions = _category_versions(events)
+    keys = [
+        card_cache_key(
+            event,
+            versions[category_version_key(event.category_id)],
+            today,
+            participant,
+        )
+        for event in events
+    ]
+
+    cached = cache.get_many(keys)
+    rendered = {}
+    for event, key in zip(events, keys):
+        if key not in cached and key not in rendered:
+            rendered[key] = render_to_string(
+                CARD_TEMPLATE,
+                {
+                    "event": event,
+                    "is_participant": participant,
+                    "csrf_token": CSRF_SENTINEL,
+                    "created_since": CREATED_SINCE_SENTINEL,
+                },
+            )
+    if rendered:
+        cache.set_many(rendered, settings.EVENT_CARD_CACHE_TIMEOUT)
+
+    CACHE_REQUESTS.inc(len(cached), cache="event_cards", result="hit")
+    CACHE_REQUESTS.inc(len(rendered), cache="event_cards", result="miss")
+
+    csrf_token = None
+    cards = []
+    for event, key in zip(events, keys):
+        html = cached[key] if key in cached else rendered[key]
+        html = html.replace(CREATED_SINCE_SENTINEL, escape(timesince(event.created_at)))
+        if CSRF_SENTINEL in html:
+            csrf_token = csrf_token or get_token(request)
+            html = html.replace(CSRF_SENTINEL, csrf_token)
+        cards.append(mark_safe(html))
+    return cards
@@ -0,0 +1,35 @@
+from apps.core.exports import export_rows
+from apps.events.models import RSVP, Event
+
+EVENT_COLUMNS = (
+    ("id", "id"),
+    ("name", "name"),
+    ("category", "category__name"),
+    ("event_date", "event_date"),
+    ("event_time", "event_time"),
+    ("location", "location"),
+    ("description", "description"),
+    ("created_at", "created_at"),
+)
+
+ATTENDEE_COLUMNS = (
+    ("rsvp_id", "id"),
+    ("event_id", "event_id"),
+    ("user_id", "user_id"),
+    ("username", "user__username"),
+    ("first_name", "user__first_name"),
+    ("last_name", "user__last_name"),
+    ("email", "user__email"),
+    ("phone_number", "user__phone_number"),
+    ("rsvp_at", "created_at"),
+)
+
+
+def export_events():
+    return export_rows(Event.objects.order_by("id"), EVENT_COLUMNS)
+
+
+def export_attendees(event_id):
+    return export_rows(
+        RSVP.objects.filter(event_id=event_id).order_by("id"), ATTENDEE_COLUMNS
+    )
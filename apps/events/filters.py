@@ -0,0 +1,190 @@
+import re
+from dataclasses import dataclass, replace
+from datetime import date
+
+from django.db.models import Count, Q
+from django.http import QueryDict
+
+from apps.events.models import PAST, TODAY, UPCOMING, Category
+from apps.events.search import search_events
+
+WHEN_LABELS = {"upcoming": UPCOMING, "today": TODAY, "past": PAST}
+
+# The single-filter ``type`` links the dashboard used to have, which may
+# still be bookmarked.
+LEGACY_WHEN = {"upcoming_events": "upcoming", "past_events": "past"}
+
+
+def when_condition(when, today):
+    return {
+        "upcoming": Q(event_date__gt=today),
+        "today": Q(event_date=today),
+        "past": Q(event_date__lt=today),
+    }[when]
+
+
+def _id(value):
+    # ASCII digits only: str.isdigit() and int() also accept other scripts'
+    # digits, and isdigit() accepts superscripts that int() rejects.
+    return int(value) if value and re.fullmatch(r"[0-9]+", value) else None
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class DashboardFilters:
+    """The dashboard's filters. Any combination of them can be applied at
+    once; values that do not parse are ignored."""
+
+    q: str = ""
+    category: int | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+    when: str | None = None
+
+    @classmethod
+    def from_query(cls, query):
+        filter_type = query.get("type")
+        q = query.get("q", "")
+        category = query.get("category", "")
+        when = query.get("when")
+
+        if filter_type == "search":
+            q = query.get("search-value", "")
+        elif filter_type == "category":
+            category = query.get("id", "")
+        elif filter_type in LEGACY_WHEN:
+            when = LEGACY_WHEN[filter_type]
+
+        return cls(
+            q=q.strip(),
+            category=_id(category),
+            date_from=_date(query.get("date-from")),
+            date_to=_date(query.get("date-to")),
+            when=when if when in WHEN_LABELS else None,
+        )
+
+    def apply(self, queryset, today, exclude=()):
+        """Filter ``queryset`` by every filter not named in ``exclude``.
+
+        A text search also orders the events by relevance.
+        """
+        if self.category is not None and "category" not in exclude:
+            queryset = queryset.filter(category_id=self.category)
+        if self.date_from:
+            queryset = queryset.filter(event_date__gte=self.date_from)
+        if self.date_to:
+            queryset = queryset.filter(event_date__lte=self.date_to)
+        if self.when and "when" not in exclude:
+            queryset = queryset.filter(when_condition(self.when, today))
+        if self.q:
+            queryset = search_events(queryset, self.q)
+        return queryset
+
+    def query(self, **changes):
+        """The URL query string for these filters with ``changes`` made."""
+        filters = replace(self, **changes)
+        params = QueryDict(mutable=True)
+        if filters.q:
+            params["q"] = filters.q
+        if filters.category is not None:
+            params["category"] = filters.category
+        if filters.date_from:
+            params["date-from"] = filters.date_from.isoformat()
+        if filters.date_to:
+            params["date-to"] = filters.date_to.isoformat()
+        if filters.when:
+            params["when"] = filters.when
+        return params.urlencode()
+
+
+def _count(condition):
+    return Count("id", filter=condition) if condition else Count("id")
+
+
+def facet_counts(queryset, filters, today):
+    """Count the events matching ``filters`` per category and per
+    upcoming/today/past bucket, in one grouped query.
+
+    Each facet is counted with the other filters applied but not its own,
+    so it shows what picking another value would give. The query groups
+    the events matching the text and date filters by category, counting
+    each bucket and the selected bucket with conditional aggregates; the
+    category and bucket totals are summed from those rows. The selected
+    category is listed even when nothing else matches it.
+    """
+    category_condition = (
+        Q(category_id=filters.category) if filters.category is not None else None
+    )
+    buckets = {
+        when: _count(
+            when_condition(when, today) & category_condition
+            if category_condition
+            else when_condition(when, today)
+        )
+        for when in WHEN_LABELS
+    }
+    when_filter = when_condition(filters.when, today) if filters.when else None
+
+    rows = (
+        filters.apply(queryset, today, exclude=("category", "when"))
+        .order_by()
+        .values("category_id", "category__name")
+        .annotate(matching=_count(when_filter), **buckets)
+    )
+
+    categories = []
+    when_counts = dict.fromkeys(WHEN_LABELS, 0)
+    for row in rows:
+        for when in WHEN_LABELS:
+            when_counts[when] += row[when]
+        if row["category_id"] is not None:
+            categories.append(
+                {
+                    "id": row["category_id"],
+                    "name": row["category__name"],
+                    "count": row["matching"],
+                    "selected": row["category_id"] == filters.category,
+                    "query": filters.query(category=row["category_id"]),
+                }
+            )
+    if filters.category is not None and not any(
+        facet["selected"] for facet in categories
+    ):
+        name = (
+            Category.objects.filter(pk=filters.category)
+            .values_list("name", flat=True)
+            .first()
+        )
+        if name is not None:
+            categories.append(
+                {
+                    "id": filters.category,
+                    "name": name,
+                    "count": 0,
+                    "selected": True,
+                    "query": filters.query(),
+                }
+            )
+    categories.sort(key=lambda facet: (facet["name"].casefold(), facet["id"]))
+
+    return {
+        "categories": categories,
+        "any_category_query": filters.query(category=None),
+        "any_when_query": filters.query(when=None),
+        "when": [
+            {
+                "value": when,
+                "label": label,
+                "count": when_counts[when],
+                "selected": when == filters.when,
+                "query": filters.query(when=when),
+            }
+            for when, label in WHEN_LABELS.items()
+        ],
+    }
@@ -57,6 +57,21 @@ class EventModelForm(StyledFormMixin, forms.ModelForm):
         return None
 
 
+class EventImportForm(StyledFormMixin, forms.Form):
+    file = forms.FileField(
+        help_text="CSV or NDJSON, optionally gzipped, with the columns name, "
+        "description, event_date, event_time, location and category."
+    )
+    dry_run = forms.BooleanField(
+        required=False, label="Only validate, do not create events"
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["file"].widget.attrs["accept"] = ".csv,.ndjson,.jsonl,.gz"
+        self.fields["dry_run"].widget.attrs["class"] = "h-4 w-4"
+
+
 class CategoryModelForm(StyledFormMixin, forms.ModelForm):
     class Meta:
         model = Category
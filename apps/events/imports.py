@@ -0,0 +1,203 @@
+import csv
+import gzip
+import io
+import json
+import re
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from apps.events.forms import EventModelForm
+from apps.events.models import Category, Event
+from apps.events.page_cache import bump_listing_version
+from apps.events.search import update_search_vectors
+from apps.events.stats import record_events_added
+
+# Columns read from each row. Any other column, such as the id and
+# created_at written by the event export, is ignored.
+IMPORT_FIELDS = ("name", "description", "event_date", "event_time", "location")
+
+# Values in these shapes are the first input format the form fields try, and
+# are parsed directly instead of through strptime.
+ISO_PARSERS = {
+    "event_date": (re.compile(r"\d{4}-\d{2}-\d{2}"), date.fromisoformat),
+    "event_time": (
+        re.compile(r"\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?"),
+        time.fromisoformat,
+    ),
+}
+
+
+# Raised while reading a file that is not UTF-8, is malformed CSV, or is a
+# truncated or corrupt gzip stream.
+READ_ERRORS = (UnicodeDecodeError, csv.Error, OSError, EOFError, zlib.error)
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, messages):
+        """Record why the row on ``line`` was rejected, as a dict mapping
+        field names (or ``__all__``) to lists of messages."""
+        self.errors.append((line, messages))
+
+
+def _csv_rows(text):
+    reader = csv.DictReader(text)
+    for row in reader:
+        # The line the row ends on; quoted values can span several lines.
+        yield reader.line_num, row
+
+
+def _ndjson_rows(text):
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else None
+
+
+def read_rows(file, fmt="csv", compressed=False):
+    """Yield ``(line number, row dict)`` from a binary file, or
+    ``(line number, None)`` for an NDJSON line that is not a JSON object."""
+    if compressed:
+        file = gzip.GzipFile(fileobj=file)
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    return _csv_rows(text) if fmt == "csv" else _ndjson_rows(text)
+
+
+def detect_format(filename):
+    """Return ``(format, compressed)`` from a file name's extensions."""
+    name = filename.lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    fmt = "ndjson" if name.endswith((".ndjson", ".jsonl")) else "csv"
+    return fmt, compressed
+
+
+class RowValidator:
+    """Clean import rows with the field rules of ``EventModelForm``.
+
+    The form's fields are built once and each value is passed through the
+    field's ``clean``, which gives the same parsing, length limits and error
+    messages as the create form at a fraction of the cost of a form per row.
+    ISO dates and times skip the field's locale-aware parsing, and categories
+    are matched by name against a map loaded with one query.
+    """
+
+    def __init__(self):
+        form = EventModelForm()
+        self.fields = {name: form.fields[name] for name in IMPORT_FIELDS}
+        self.category_field = form.fields["category"]
+
+        # Category names are not unique; the oldest category wins.
+        self.categories = {}
+        for category_id, name in Category.objects.order_by("id").values_list(
+            "id", "name"
+        ):
+            self.categories.setdefault(name.strip().casefold(), category_id)
+
+    def _category_id(self, value):
+        if value is not None and not isinstance(value, str):
+            raise ValidationError("Enter a text value.", code="invalid")
+        name = (value or "").strip()
+        if not name:
+            raise ValidationError(
+                self.category_field.error_messages["required"], code="required"
+            )
+        try:
+            return self.categories[name.casefold()]
+        except KeyError:
+            raise ValidationError(
+                f'Unknown category "{name}".', code="invalid_choice"
+            ) from None
+
+    def _clean_field(self, name, value):
+        # NDJSON values can be numbers, lists or objects, which the form
+        # fields either misparse or fail on with something other than a
+        # ValidationError.
+        if value is not None and not isinstance(value, str):
+            raise ValidationError("Enter a text value.", code="invalid")
+        if name in ISO_PARSERS and value is not None:
+            pattern, parse = ISO_PARSERS[name]
+            value = value.strip()
+            if pattern.fullmatch(value):
+                try:
+                    return parse(value)
+                except ValueError:
+                    pass
+        return self.fields[name].clean(value)
+
+    def clean(self, row):
+        """Return ``(Event, None)`` for a valid row, or ``(None, errors)``."""
+        if row is None:
+            return None, {"__all__": ["Not a JSON object."]}
+
+        values = {}
+        errors = {}
+        for name in IMPORT_FIELDS:
+            try:
+                values[name] = self._clean_field(name, row.get(name))
+            except ValidationError as error:
+                errors[name] = error.messages
+        try:
+            values["category_id"] = self._category_id(row.get("category"))
+        except ValidationError as error:
+            errors["category"] = error.messages
+
+        if errors:
+            return None, errors
+        return Event(**values), None
+
+
+def _insert(batch):
+    with transaction.atomic():
+        created = Event.objects.bulk_create(batch)
+        update_search_vectors(Event.objects.filter(pk__in=[e.pk for e in created]))
+        record_events_added(event.event_date for event in created)
+        bump_listing_version()
+    return len(created)
+
+
+def import_events(rows, batch_size=None, dry_run=False):
+    """Validate and insert events from ``(line number, row)`` pairs.
+
+    Valid rows are inserted with ``bulk_create``, ``batch_size`` rows per
+    transaction, so a failure only rolls back its own batch. ``bulk_create``
+    does not send signals, so the search vectors, dashboard counters and
+    listing cache are updated here instead. Invalid rows are skipped and
+    reported in the result; with ``dry_run`` nothing is inserted.
+    """
+    batch_size = batch_size or settings.EVENT_IMPORT_BATCH_SIZE
+    validator = RowValidator()
+    result = ImportResult()
+
+    batch = []
+    for line, row in rows:
+        result.rows += 1
+        event, errors = validator.clean(row)
+        if errors:
+            result.add_error(line, errors)
+            continue
+        if dry_run:
+            continue
+
+        batch.append(event)
+        if len(batch) >= batch_size:
+            result.created += _insert(batch)
+            batch = []
+
+    if batch:
+        result.created += _insert(batch)
+    return result
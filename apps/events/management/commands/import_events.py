@@ -0,0 +1,74 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.events.imports import READ_ERRORS, detect_format, import_events, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Create events from a CSV or NDJSON file, optionally gzipped, "
+        "reporting every row that fails validation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin.")
+        parser.add_argument(
+            "--format",
+            choices=("csv", "ndjson"),
+            help="Input format. Defaults to the file extension, or csv.",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Decompress the input. Implied by a .gz extension.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.EVENT_IMPORT_BATCH_SIZE,
+            help="Rows inserted per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the rows without creating any events.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt, compressed = detect_format(path)
+        fmt = options["format"] or fmt
+        compressed = compressed or options["gzip"]
+
+        try:
+            file = sys.stdin.buffer if path == "-" else open(path, "rb")
+        except OSError as error:
+            raise CommandError(f"Cannot open {path}: {error}")
+
+        with file:
+            try:
+                result = import_events(
+                    read_rows(file, fmt, compressed),
+                    batch_size=options["batch_size"],
+                    dry_run=options["dry_run"],
+                )
+            except READ_ERRORS as error:
+                raise CommandError(f"Cannot read {path}: {error}")
+
+        for line, errors in result.errors:
+            for field, messages in errors.items():
+                self.stderr.write(f"Line {line}: {field}: {' '.join(messages)}")
+
+        summary = (
+            f"Checked {result.rows} rows"
+            if options["dry_run"]
+            else f"Created {result.created} of {result.rows} events"
+        )
+        summary += f", {len(result.errors)} with errors."
+        self.stdout.write(
+            self.style.WARNING(summary)
+            if result.errors
+            else self.style.SUCCESS(summary)
+        )
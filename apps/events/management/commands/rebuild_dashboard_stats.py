@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.events.stats import rebuild_dashboard_stats
+
+
+class Command(BaseCommand):
+    help = "Recount the materialized dashboard statistics from scratch."
+
+    def handle(self, *args, **options):
+        stats = rebuild_dashboard_stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt dashboard stats as of {stats.as_of}: "
+                f"{stats.total_events} events ({stats.upcoming_events} upcoming, "
+                f"{stats.past_events} past), {stats.total_rsvps} RSVPs."
+            )
+        )
@@ -0,0 +1,44 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.events.stats import rollover_dashboard_stats
+
+
+def seconds_until_local_midnight():
+    now = timezone.localtime()
+    midnight = timezone.make_aware(
+        datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    )
+    return max((midnight - now).total_seconds(), 0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move events between the upcoming and past dashboard counters when the "
+        "local date (TIME_ZONE) changes. Run it from cron shortly after "
+        "midnight, or keep it running with --forever."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--forever",
+            action="store_true",
+            help="Sleep until each local midnight and roll the counters over.",
+        )
+
+    def handle(self, *args, **options):
+        self.rollover()
+
+        while options["forever"]:
+            time.sleep(seconds_until_local_midnight() + 1)
+            self.rollover()
+
+    def rollover(self):
+        stats = rollover_dashboard_stats()
+        self.stdout.write(
+            f"Dashboard stats as of {stats.as_of}: "
+            f"{stats.upcoming_events} upcoming, {stats.past_events} past."
+        )
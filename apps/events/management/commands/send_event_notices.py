@@ -0,0 +1,61 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.events.models import EventNotice
+from apps.events.notifications import record_failure, send_notice
+
+
+class Command(BaseCommand):
+    help = (
+        "Send pending event change and cancellation notices to attendees, "
+        "retrying failures with backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.EVENT_NOTICE_BATCH_SIZE,
+            help="Number of emails to hand to the email backend at once.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=10,
+            help="Seconds to wait when there is nothing to send.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit after sending the notices that are due instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            notices = EventNotice.objects.filter(
+                completed_at__isnull=True,
+                failed_at__isnull=True,
+                next_attempt_at__lte=timezone.now(),
+            ).order_by("created_at")
+
+            for notice in notices:
+                try:
+                    sent = send_notice(notice, options["batch_size"])
+                except Exception as e:
+                    record_failure(notice, e)
+                    if notice.failed_at:
+                        self.stderr.write(
+                            f"Giving up on '{notice}' after {notice.attempts} "
+                            f"attempts: {e}"
+                        )
+                    else:
+                        self.stderr.write(f"Failed to send '{notice}', will retry: {e}")
+                    continue
+                self.stdout.write(f"Sent '{notice}' to {sent} attendees.")
+
+            if options["once"]:
+                break
+            time.sleep(options["poll_interval"])
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("total_events", models.IntegerField(default=0)),
+                ("upcoming_events", models.IntegerField(default=0)),
+                ("past_events", models.IntegerField(default=0)),
+                ("total_rsvps", models.IntegerField(default=0)),
+                ("as_of", models.DateField()),
+            ],
+            options={
+                "verbose_name_plural": "dashboard stats",
+            },
+        ),
+    ]
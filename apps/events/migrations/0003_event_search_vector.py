@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from apps.core.db import PostgreSQLOnly, is_postgresql
+from apps.events.search import build_search_vector
+
+
+def populate_search_vectors(apps, schema_editor):
+    if not is_postgresql(schema_editor.connection):
+        return
+
+    Event = apps.get_model("events", "Event")
+    Category = apps.get_model("events", "Category")
+    Event.objects.update(search_vector=build_search_vector(Category))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0002_dashboardstats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name="event",
+                index=django.contrib.postgres.indexes.GinIndex(
+                    fields=["search_vector"], name="event_search_vector_gin"
+                ),
+            )
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:11
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from apps.core.db import PostgreSQLOnly
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_event_search_vector"),
+    ]
+
+    operations = [
+        PostgreSQLOnly(TrigramExtension()),
+        PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name="event",
+                index=django.contrib.postgres.indexes.GinIndex(
+                    django.contrib.postgres.indexes.OpClass(
+                        django.db.models.functions.text.Upper("name"),
+                        name="gin_trgm_ops",
+                    ),
+                    name="event_name_trgm",
+                ),
+            )
+        ),
+        PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name="event",
+                index=django.contrib.postgres.indexes.GinIndex(
+                    django.contrib.postgres.indexes.OpClass(
+                        django.db.models.functions.text.Upper("location"),
+                        name="gin_trgm_ops",
+                    ),
+                    name="event_location_trgm",
+                ),
+            )
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0004_event_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["event_date", "id"], name="event_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                condition=models.Q(("category__isnull", False)),
+                fields=["category", "event_date", "id"],
+                name="event_category_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rsvp",
+            index=models.Index(
+                fields=["user", "-created_at"], name="rsvp_user_created_idx"
+            ),
+        ),
+    ]
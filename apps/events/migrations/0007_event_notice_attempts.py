@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0006_event_notices"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="eventnotice",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="eventnotice",
+            name="failed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="eventnotice",
+            name="last_error",
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0007_event_notice_attempts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="eventnotice",
+            name="next_attempt_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,9 +1,52 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Case, Value, When
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+TODAY = "Today"
+UPCOMING = "Upcoming"
+PAST = "Past"
+
+
+def day_status_expression(today, prefix=""):
+    """SQL for the Today/Upcoming/Past label of the event at ``prefix``."""
+    return Case(
+        When(**{f"{prefix}event_date": today}, then=Value(TODAY)),
+        When(**{f"{prefix}event_date__gt": today}, then=Value(UPCOMING)),
+        default=Value(PAST),
+        output_field=models.CharField(),
+    )
+
+
+class EventQuerySet(models.QuerySet):
+    def with_day_status(self, today):
+        """Annotate ``status``, which ``Event.day_status`` then returns
+        instead of comparing against the current date again."""
+        return self.annotate(status=day_status_expression(today))
+
+
+class RSVPQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(user=user)
+
+    def with_day_status(self, today):
+        """Annotate ``event_status``, the day status of the RSVPed event."""
+        return self.annotate(event_status=day_status_expression(today, "event__"))
+
+    def delete(self):
+        # Counted from the number of rows removed rather than in a post_delete
+        # receiver, which would stop Django deleting RSVPs with one DELETE.
+        from apps.events.stats import record_rsvp_change
+
+        deleted, rows = super().delete()
+        record_rsvp_change(-rows.get(RSVP._meta.label, 0))
+        return deleted, rows
+
 
 class Event(models.Model):
     name = models.CharField(max_length=250)
@@ -23,16 +66,42 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     last_modified = models.DateTimeField(auto_now=True)
 
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["event_date", "id"], name="event_date_id_idx"),
+            models.Index(
+                fields=["category", "event_date", "id"],
+                name="event_category_date_idx",
+                condition=models.Q(category__isnull=False),
+            ),
+            GinIndex(fields=["search_vector"], name="event_search_vector_gin"),
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="event_name_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("location"), name="gin_trgm_ops"),
+                name="event_location_trgm",
+            ),
+        ]
+
     @property
     def day_status(self):
+        if "status" in self.__dict__:
+            return self.status
+
         today = timezone.localdate()
 
         if self.event_date == today:
-            return "Today"
+            return TODAY
         elif self.event_date > today:
-            return "Upcoming"
+            return UPCOMING
         else:
-            return "Past"
+            return PAST
 
     def has_custom_event_image(self):
         return self.image and self.image.name != "events/default.jpg"
@@ -54,8 +123,82 @@ class RSVP(models.Model):
     event = models.ForeignKey("Event", on_delete=models.CASCADE, related_name="rsvps")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = RSVPQuerySet.as_manager()
+
     class Meta:
         unique_together = ("user", "event")
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="rsvp_user_created_idx"),
+        ]
+
+    def delete(self, *args, **kwargs):
+        # Counted here rather than in a post_delete receiver: a receiver would
+        # make every Event or user deletion load its RSVPs one by one instead
+        # of removing them with a single DELETE. Cascades are counted by the
+        # parent's pre_delete receiver.
+        from apps.events.stats import record_rsvp_change
+
+        result = super().delete(*args, **kwargs)
+        record_rsvp_change(-1)
+        return result
 
     def __str__(self):
         return f"{self.user} → {self.event}"
+
+
+class DashboardStats(models.Model):
+    total_events = models.IntegerField(default=0)
+    upcoming_events = models.IntegerField(default=0)
+    past_events = models.IntegerField(default=0)
+    total_rsvps = models.IntegerField(default=0)
+    as_of = models.DateField()
+
+    class Meta:
+        verbose_name_plural = "dashboard stats"
+
+    def __str__(self):
+        return f"Dashboard stats as of {self.as_of}"
+
+
+class EventNotice(models.Model):
+    CHANGED = "changed"
+    CANCELLED = "cancelled"
+    KIND_CHOICES = [
+        (CHANGED, "Changed"),
+        (CANCELLED, "Cancelled"),
+    ]
+
+    event = models.ForeignKey(
+        "Event", on_delete=models.SET_NULL, null=True, related_name="notices"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # Set when sending has failed EVENT_NOTICE_MAX_ATTEMPTS times; the notice
+    # is then left alone until someone looks at last_error.
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.subject
+
+
+class EventNoticeRecipient(models.Model):
+    notice = models.ForeignKey(
+        "EventNotice", on_delete=models.CASCADE, related_name="recipients"
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["notice", "id"],
+                name="notice_pending_recipient_idx",
+                condition=models.Q(sent_at__isnull=True),
+            ),
+        ]
@@ -0,0 +1,163 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection
+from django.utils import timezone
+
+from apps.core.mail import retry_delay
+from apps.core.metrics import EMAILS_SENT
+from apps.events.models import RSVP, EventNotice, EventNoticeRecipient
+
+NOTIFIED_FIELDS = {
+    "event_date": "Date",
+    "event_time": "Time",
+    "location": "Location",
+}
+
+
+def changed_fields(previous, event):
+    """Return ``{label: (old, new)}`` for attendee-facing fields that changed."""
+    if not previous:
+        return {}
+
+    changes = {}
+    for field, label in NOTIFIED_FIELDS.items():
+        old = previous[field]
+        new = event._meta.get_field(field).to_python(getattr(event, field))
+        if old != new:
+            changes[label] = (old, new)
+    return changes
+
+
+def _render_changed(event, changes):
+    subject = f"Update: {event.name} has changed"
+    lines = "\n".join(
+        f"        - {label}: {old} → {new}" for label, (old, new) in changes.items()
+    )
+    message = f"""
+        Hi,
+
+        An event you RSVPed to has been updated.
+
+        What changed:
+{lines}
+
+        Event Details:
+        - Name: {event.name}
+        - Date: {event.event_date}
+        - Time: {event.event_time}
+        - Location: {event.location}
+
+        Best regards,
+        Arnab Saha
+        """
+    return subject, message
+
+
+def _render_cancelled(event):
+    subject = f"Cancelled: {event.name}"
+    message = f"""
+        Hi,
+
+        We're sorry to let you know that the event "{event.name}" scheduled for
+        {event.event_date} at {event.location} has been cancelled.
+
+        Your RSVP has been removed.
+
+        Best regards,
+        Arnab Saha
+        """
+    return subject, message
+
+
+def create_notice(event, kind, changes=None):
+    """Record a notice for everyone who RSVPed to ``event``.
+
+    The message is rendered once, and the recipient list is copied from the
+    RSVP table with a single ``INSERT ... SELECT`` so it survives the event
+    being deleted and never passes through Python.
+    """
+    if not RSVP.objects.filter(event=event).exists():
+        return None
+
+    if kind == EventNotice.CANCELLED:
+        subject, message = _render_cancelled(event)
+    else:
+        subject, message = _render_changed(event, changes)
+
+    notice = EventNotice.objects.create(
+        event=event if kind == EventNotice.CHANGED else None,
+        kind=kind,
+        subject=subject,
+        body=message,
+    )
+
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(EventNoticeRecipient._meta.db_table)} "
+            f"({qn('notice_id')}, {qn('user_id')}) "
+            f"SELECT %s, {qn('user_id')} FROM {qn(RSVP._meta.db_table)} "
+            f"WHERE {qn('event_id')} = %s",
+            [notice.pk, event.pk],
+        )
+    return notice
+
+
+def send_notice(notice, batch_size=None):
+    """Stream the notice's unsent recipients and send them in batches over
+    one email connection. Returns the number of emails sent."""
+    batch_size = batch_size or settings.EVENT_NOTICE_BATCH_SIZE
+    recipients = (
+        EventNoticeRecipient.objects.filter(notice=notice, sent_at__isnull=True)
+        .exclude(user__email="")
+        .order_by("id")
+        .values_list("id", "user__email")
+        .iterator(chunk_size=batch_size)
+    )
+
+    sent = 0
+    batch = []
+    with get_connection() as email_connection:
+        for recipient_id, email in recipients:
+            batch.append((recipient_id, email))
+            if len(batch) >= batch_size:
+                sent += _send_batch(notice, batch, email_connection)
+                batch = []
+        if batch:
+            sent += _send_batch(notice, batch, email_connection)
+
+    notice.completed_at = timezone.now()
+    notice.save(update_fields=["completed_at"])
+    return sent
+
+
+def record_failure(notice, error):
+    """Count a failed attempt at sending ``notice`` and schedule a retry with
+    the outbox's backoff, or dead-letter it once EVENT_NOTICE_MAX_ATTEMPTS is
+    reached. Recipients already sent to keep their ``sent_at``, so a retry
+    only sends to the rest."""
+    notice.attempts += 1
+    notice.last_error = str(error)
+    if notice.attempts >= settings.EVENT_NOTICE_MAX_ATTEMPTS:
+        notice.failed_at = timezone.now()
+    else:
+        notice.next_attempt_at = timezone.now() + retry_delay(notice.attempts)
+    notice.save(
+        update_fields=["attempts", "next_attempt_at", "last_error", "failed_at"]
+    )
+
+
+def _send_batch(notice, batch, email_connection):
+    messages = [
+        EmailMessage(notice.subject, notice.body, to=[email]) for _, email in batch
+    ]
+    try:
+        email_connection.send_messages(messages)
+    except Exception:
+        EMAILS_SENT.inc(len(messages), source="event_notice", outcome="failed")
+        raise
+    EMAILS_SENT.inc(len(messages), source="event_notice", outcome="sent")
+    EventNoticeRecipient.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+        sent_at=timezone.now()
+    )
+    return len(messages)
@@ -0,0 +1,121 @@
+import re
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.timesince import timesince
+
+from apps.core.helpers import bump_cache_version, cache_version, user_role_flags
+from apps.core.metrics import CACHE_REQUESTS
+from apps.events.cards import CSRF_SENTINEL
+
+LISTING_VERSION_KEY = "events:listing-version"
+
+# Templates write this marker followed by a Unix timestamp where a
+# ``timesince`` belongs; it is expanded on every response.
+SINCE_MARKER = "since-sentinel-7d41:"
+SINCE_PATTERN = re.compile(re.escape(SINCE_MARKER) + r"(\d+)")
+
+REBUILD_LOCK_TIMEOUT = 30
+REBUILD_POLL_INTERVAL = 0.05
+
+
+def bump_listing_version():
+    # Bump again once the transaction commits, so a page rebuilt from the
+    # not yet committed data in between is not served under the new version.
+    bump_cache_version(LISTING_VERSION_KEY)
+    transaction.on_commit(lambda: bump_cache_version(LISTING_VERSION_KEY))
+
+
+def cached_listing_value(name, compute):
+    """Return ``compute()``, cached under the listing version like the pages,
+    for values such as page counts that change only with the events."""
+    key = f"events:listing-value:{name}:{timezone.localdate().isoformat()}"
+    cached = cache.get_many([LISTING_VERSION_KEY, key])
+    version = cached.get(LISTING_VERSION_KEY) or cache_version(LISTING_VERSION_KEY)
+    entry = cached.get(key)
+    if entry and entry[0] == version:
+        return entry[1]
+
+    value = compute()
+    cache.set(key, (version, value), settings.EVENT_LISTING_CACHE_TIMEOUT)
+    return value
+
+
+def _finish(request, html):
+    html = SINCE_PATTERN.sub(
+        lambda match: timesince(
+            datetime.fromtimestamp(int(match.group(1)), tz=dt_timezone.utc)
+        ),
+        html,
+    )
+    if CSRF_SENTINEL in html:
+        html = html.replace(CSRF_SENTINEL, get_token(request))
+    return HttpResponse(html)
+
+
+def _wait_for(key, version):
+    deadline = time.monotonic() + REBUILD_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(REBUILD_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry and entry[0] == version:
+            return entry[1]
+    return None
+
+
+def cached_page(request, name, render, cacheable=True):
+    """Serve a page shared by every user with the same role flags.
+
+    ``render(context)`` must render the page with ``context`` merged in, which
+    puts sentinels in place of the CSRF token and timesince values.
+
+    The page is stored with the listing version it was built from. When the
+    version moves on, one request takes a lock and rebuilds it; the others
+    serve the previous copy meanwhile, or wait for the rebuild when there is
+    none. Requests carrying flash messages bypass the cache, as do pages
+    that are not ``cacheable``.
+    """
+    context = {"csrf_token": CSRF_SENTINEL, "since_marker": SINCE_MARKER}
+    if not cacheable or len(get_messages(request)):
+        return _finish(request, render(context))
+
+    # Keyed on the flags the templates branch on rather than the group
+    # names, since a superuser is an admin whatever their groups.
+    roles = ",".join(
+        flag for flag, value in user_role_flags(request.user).items() if value
+    )
+    key = f"events:listing:{name}:{timezone.localdate().isoformat()}:{roles}"
+    cached = cache.get_many([LISTING_VERSION_KEY, key])
+    version = cached.get(LISTING_VERSION_KEY) or cache_version(LISTING_VERSION_KEY)
+    entry = cached.get(key)
+
+    if entry and entry[0] == version:
+        CACHE_REQUESTS.inc(cache="event_listing", result="hit")
+        return _finish(request, entry[1])
+
+    lock_key = f"{key}:rebuild:{version}"
+    if cache.add(lock_key, True, REBUILD_LOCK_TIMEOUT):
+        CACHE_REQUESTS.inc(cache="event_listing", result="miss")
+        try:
+            html = render(context)
+            cache.set(key, (version, html), settings.EVENT_LISTING_CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return _finish(request, html)
+
+    if entry:
+        CACHE_REQUESTS.inc(cache="event_listing", result="stale")
+        return _finish(request, entry[1])
+
+    CACHE_REQUESTS.inc(cache="event_listing", result="wait")
+    html = _wait_for(key, version)
+    if html is None:
+        html = render(context)
+    return _finish(request, html)
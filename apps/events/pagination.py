@@ -0,0 +1,235 @@
+import base64
+import re
+from datetime import date
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from apps.core.db import estimated_row_count
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(event_date, pk):
+    raw = f"{event_date.isoformat()}:{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        day, pk = raw.split(":")
+        return date.fromisoformat(day), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(value)
+
+
+class TimelinePage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class TimelinePaginator:
+    """Keyset pagination over the dashboard timeline order.
+
+    Upcoming events (``event_date >= today``) come first in ascending date
+    order, followed by past events in descending date order, with ``id`` as
+    the tiebreaker. Rather than sorting on a computed key, a page is read
+    from two range queries on ``date_field``, upcoming then past, each
+    ordered the way an ``(event_date, id)`` index is walked and cut off at
+    the rows still needed, so the first page costs the same however many
+    events there are. ``date_field`` may follow a relation, such as
+    ``event__event_date`` for RSVPs. Cursors are ``(date, id)`` pairs.
+    """
+
+    def __init__(self, queryset, per_page, today, date_field="event_date"):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.today = today
+        self.date_field = date_field
+
+    def _ranges(self):
+        field = self.date_field
+        return [
+            (Q(**{f"{field}__gte": self.today}), 1),
+            (Q(**{f"{field}__lt": self.today}), -1),
+        ]
+
+    def _order(self, direction, reverse=False):
+        ascending = (direction > 0) != reverse
+        date = self.date_field if ascending else f"-{self.date_field}"
+        return (date, "-id" if reverse else "id")
+
+    def _beyond(self, direction, event_date, pk, reverse=False):
+        # Rows after (or, with reverse, before) the cursor within a range.
+        # The bound on the date alone keeps this a range on the index; the
+        # OR only trims rows on the cursor's own date.
+        field = self.date_field
+        later = "gt" if (direction > 0) != reverse else "lt"
+        return Q(**{f"{field}__{later}e": event_date}) & (
+            Q(**{f"{field}__{later}": event_date})
+            | Q(**{"id__lt" if reverse else "id__gt": pk})
+        )
+
+    def _cursor(self, row):
+        value = row
+        for name in self.date_field.split("__"):
+            value = getattr(value, name)
+        return encode_cursor(value, row.pk)
+
+    def range_querysets(self, after=None, before=None):
+        """The querysets a page is read from, in order, unsliced."""
+        ranges = self._ranges()
+        cursor = decode_cursor(before or after) if before or after else None
+        reverse = bool(before)
+
+        start = 0
+        if cursor:
+            start = 0 if cursor[0] >= self.today else 1
+        walk = ranges[start::-1] if reverse else ranges[start:]
+
+        querysets = []
+        for index, (condition, direction) in enumerate(walk):
+            queryset = self.queryset.filter(condition)
+            if cursor and index == 0:
+                queryset = queryset.filter(
+                    self._beyond(direction, *cursor, reverse=reverse)
+                )
+            querysets.append(queryset.order_by(*self._order(direction, reverse)))
+        return querysets
+
+    def _read(self, querysets):
+        rows = []
+        for queryset in querysets:
+            rows.extend(queryset[: self.per_page + 1 - len(rows)])
+            if len(rows) > self.per_page:
+                break
+        return rows
+
+    def page(self, after=None, before=None):
+        limit = self.per_page
+
+        if before:
+            rows = self._read(self.range_querysets(before=before))
+            has_more = len(rows) > limit
+            rows = rows[:limit][::-1]
+            if not rows:
+                return self.page()
+            return TimelinePage(
+                rows,
+                next_cursor=self._cursor(rows[-1]),
+                previous_cursor=self._cursor(rows[0]) if has_more else None,
+            )
+
+        rows = self._read(self.range_querysets(after=after))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return TimelinePage(
+            rows,
+            next_cursor=self._cursor(rows[-1]) if has_more else None,
+            previous_cursor=self._cursor(rows[0]) if after and rows else None,
+        )
+
+
+class OffsetPaginator:
+    """Numbered pages by offset, for orders with no cursor to seek to, such
+    as search rank. One row past the page is read to tell whether there is
+    a next page, so no ``COUNT(*)`` is run. Pages come back as
+    TimelinePages whose cursors are page numbers."""
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, number=None):
+        number = int(number) if number and re.fullmatch(r"[0-9]+", number) else 1
+        number = max(number, 1)
+        offset = (number - 1) * self.per_page
+        rows = list(self.queryset[offset : offset + self.per_page + 1])
+        if not rows and number > 1:
+            return self.page()
+        return TimelinePage(
+            rows[: self.per_page],
+            next_cursor=str(number + 1) if len(rows) > self.per_page else None,
+            previous_cursor=str(number - 1) if number > 1 else None,
+        )
+
+
+class TimelinePaginationMixin:
+    """Paginate a ListView with TimelinePaginator, reading the cursor from
+    ``?after=`` or ``?before=``. The view sets ``self.today``."""
+
+    timeline_date_field = "event_date"
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = TimelinePaginator(
+            queryset, page_size, self.today, self.timeline_date_field
+        )
+        try:
+            page = paginator.page(
+                after=self.request.GET.get("after"),
+                before=self.request.GET.get("before"),
+            )
+        except InvalidCursor:
+            page = paginator.page()
+
+        page.next_query = self._cursor_query("after", page.next_cursor)
+        page.previous_query = self._cursor_query("before", page.previous_cursor)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def _cursor_query(self, name, cursor):
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params.pop("after", None)
+        params.pop("before", None)
+        # Links lead to whole pages, even from a fragment.
+        params.pop("partial", None)
+        params[name] = cursor
+        return params.urlencode()
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that skips the exact ``COUNT(*)`` on large tables.
+
+    With ``estimate=True``, meant for unfiltered listings, the table's row
+    estimate from the planner statistics is used instead once it reaches
+    ``EVENT_LIST_ESTIMATE_THRESHOLD``. Below that, or when no estimate is
+    available, the count is exact. ``estimated`` tells which one was used.
+    """
+
+    def __init__(self, object_list, per_page, estimate=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.estimate = estimate
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        if self.estimate:
+            rows = estimated_row_count(self.object_list.model)
+            if rows is not None and rows >= settings.EVENT_LIST_ESTIMATE_THRESHOLD:
+                self.estimated = True
+                return rows
+        return super().count
@@ -0,0 +1,178 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Greatest, Upper
+
+from apps.core.db import is_postgresql
+
+SEARCH_WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2}
+
+SEARCH_FIELDS = (
+    ("name", "A"),
+    ("category__name", "B"),
+    ("location", "B"),
+    ("description", "C"),
+)
+
+
+def search_terms(query):
+    return re.findall(r"\w+", query.lower())
+
+
+def _trigrams(text):
+    trigrams = set()
+    for word in search_terms(text):
+        padded = f"  {word} "
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def word_similarity(query, text):
+    """Pure-Python stand-in for pg_trgm's ``word_similarity()``.
+
+    Compares the trigrams of ``query`` with every run of consecutive words in
+    ``text`` and returns the best Jaccard score. pg_trgm works on arbitrary
+    trigram extents rather than whole words, so scores can differ slightly.
+    """
+    if not query or not text:
+        return 0.0
+
+    target = _trigrams(query)
+    if not target:
+        return 0.0
+
+    words = search_terms(text)
+    best = 0.0
+    for start in range(len(words)):
+        extent = set()
+        for word in words[start:]:
+            extent |= _trigrams(word)
+            best = max(best, len(target & extent) / len(target | extent))
+    return best
+
+
+def configure_connection(connection):
+    """Prepare a new database connection for trigram matching."""
+    threshold = settings.EVENT_SEARCH_TRIGRAM_THRESHOLD
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET pg_trgm.word_similarity_threshold = %s", [threshold])
+    elif connection.vendor == "sqlite":
+        connection.connection.create_function(
+            "WORD_SIMILARITY", 2, word_similarity, deterministic=True
+        )
+
+
+def _trigram_similarity(query):
+    return Greatest(
+        TrigramWordSimilarity(query, "name"),
+        TrigramWordSimilarity(query, "location"),
+    )
+
+
+def build_search_vector(category_model):
+    """Weighted tsvector over the event columns and its category name.
+
+    The category name comes from a correlated subquery so the expression can
+    be used in ``QuerySet.update()``, which does not allow joins.
+    """
+    config = settings.EVENT_SEARCH_CONFIG
+    category_name = Subquery(
+        category_model.objects.filter(pk=OuterRef("category_id")).values("name")[:1]
+    )
+    return (
+        SearchVector("name", weight="A", config=config)
+        + SearchVector(category_name, weight="B", config=config)
+        + SearchVector("location", weight="B", config=config)
+        + SearchVector("description", weight="C", config=config)
+    )
+
+
+def update_search_vectors(queryset):
+    if not is_postgresql():
+        return 0
+
+    from apps.events.models import Category
+
+    return queryset.update(search_vector=build_search_vector(Category))
+
+
+def search_events(queryset, query):
+    """Filter ``queryset`` down to events matching ``query``, best matches
+    first.
+
+    An event matches when every term prefix-matches its text, when the whole
+    query is a substring of its name or location, or when the query is
+    trigram-similar to a word run in its name or location, which tolerates
+    typos.
+    """
+    query = query.strip()
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    if is_postgresql():
+        return _postgres_search(queryset, query, terms)
+    return _fallback_search(queryset, query, terms)
+
+
+def _postgres_search(queryset, query, terms):
+    search_query = SearchQuery(
+        " & ".join(f"{term}:*" for term in terms),
+        search_type="raw",
+        config=settings.EVENT_SEARCH_CONFIG,
+    )
+    # The trigram GIN indexes are on UPPER(name) and UPPER(location), which
+    # is also the expression icontains compiles to, so one index per column
+    # serves both the substring and the similarity (%>) lookups.
+    queryset = queryset.annotate(
+        name_upper=Upper("name"), location_upper=Upper("location")
+    )
+    return (
+        queryset.filter(
+            Q(search_vector=search_query)
+            | Q(name__icontains=query)
+            | Q(location__icontains=query)
+            | Q(name_upper__trigram_word_similar=query)
+            | Q(location_upper__trigram_word_similar=query)
+        )
+        .annotate(
+            rank=SearchRank(F("search_vector"), search_query)
+            + _trigram_similarity(query)
+        )
+        .order_by("-rank", "-event_date", "id")
+    )
+
+
+def _fallback_search(queryset, query, terms):
+    all_terms = Q()
+    rank = _trigram_similarity(query)
+
+    for term in terms:
+        matches_term = Q()
+        for field, weight in SEARCH_FIELDS:
+            lookup = Q(**{f"{field}__icontains": term})
+            matches_term |= lookup
+            rank += Case(
+                When(lookup, then=Value(SEARCH_WEIGHTS[weight])),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        all_terms &= matches_term
+
+    return (
+        queryset.annotate(
+            similarity=_trigram_similarity(query),
+            rank=rank,
+        )
+        .filter(all_terms | Q(similarity__gte=settings.EVENT_SEARCH_TRIGRAM_THRESHOLD))
+        .order_by("-rank", "-event_date", "id")
+    )
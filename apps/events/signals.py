@@ -1,8 +1,19 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save
-from django.core.mail import send_mail
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.contrib.auth import get_user_model
 from django.conf import settings
-from .models import RSVP
+from apps.core.images import get_manifest
+from apps.core.mail import enqueue_mail
+from apps.core.metrics import EMAILS_QUEUED, RSVPS_CREATED
+from .cards import bump_category_version
+from .page_cache import bump_listing_version
+from .models import RSVP, Category, Event, EventNotice
+from .notifications import changed_fields, create_notice
+from .search import configure_connection, update_search_vectors
+from .stats import record_event_change, record_rsvp_change
+
+User = get_user_model()
 
 
 @receiver(post_save, sender=RSVP)
@@ -28,9 +39,128 @@ def send_rsvp_confirmation_email(sender, instance, created, **kwargs):
 
         recipient_list = [instance.user.email]
 
-        try:
-            send_mail(subject, message, settings.EMAIL_HOST_USER, recipient_list)
-        except Exception as e:
-            print(
-                f"Failed to send RSVP confirmation email to {instance.user.email}: {str(e)}"
-            )
+        enqueue_mail(subject, message, recipient_list, settings.EMAIL_HOST_USER)
+        EMAILS_QUEUED.inc(kind="rsvp_confirmation")
+
+
+def _as_date(value):
+    return Event._meta.get_field("event_date").to_python(value)
+
+
+@receiver(pre_save, sender=Event)
+def remember_previous_event(sender, instance, raw, **kwargs):
+    instance._previous = None
+    if instance.pk and not raw:
+        instance._previous = (
+            Event.objects.filter(pk=instance.pk)
+            .values("event_date", "event_time", "location")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Event)
+def count_saved_event(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_previous", None)
+    old_date = previous["event_date"] if previous else None
+    record_event_change(old_date, _as_date(instance.event_date))
+
+
+@receiver(post_delete, sender=Event)
+def count_deleted_event(sender, instance, **kwargs):
+    record_event_change(_as_date(instance.event_date), None)
+
+
+@receiver(post_save, sender=RSVP)
+def count_saved_rsvp(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        record_rsvp_change(1)
+        RSVPS_CREATED.inc()
+
+
+# RSVPs deleted directly are counted by RSVP.delete() and RSVPQuerySet.delete();
+# those removed by a cascade are counted here, with one COUNT per parent.
+@receiver(pre_delete, sender=Event)
+def count_cascaded_event_rsvps(sender, instance, **kwargs):
+    record_rsvp_change(-RSVP.objects.filter(event=instance).count())
+
+
+@receiver(pre_delete, sender=User)
+def count_cascaded_user_rsvps(sender, instance, **kwargs):
+    record_rsvp_change(-RSVP.objects.filter(user=instance).count())
+
+
+@receiver(post_save, sender=Event)
+def notify_attendees_of_change(sender, instance, created, raw, **kwargs):
+    if created or raw:
+        return
+    changes = changed_fields(getattr(instance, "_previous", None), instance)
+    if changes:
+        create_notice(instance, EventNotice.CHANGED, changes)
+
+
+@receiver(pre_delete, sender=Event)
+def notify_attendees_of_cancellation(sender, instance, **kwargs):
+    create_notice(instance, EventNotice.CANCELLED)
+
+
+@receiver(post_save, sender=Event)
+def refresh_event_search_vector(sender, instance, raw, **kwargs):
+    if not raw:
+        update_search_vectors(Event.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_search_vectors(sender, instance, raw, **kwargs):
+    if not raw:
+        update_search_vectors(Event.objects.filter(category=instance))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_events(sender, instance, **kwargs):
+    # Read before SET_NULL leaves them indistinguishable from other events
+    # without a category.
+    instance._event_ids = list(
+        Event.objects.filter(category=instance).values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Category)
+def refresh_orphaned_search_vectors(sender, instance, **kwargs):
+    event_ids = getattr(instance, "_event_ids", None)
+    if event_ids:
+        update_search_vectors(Event.objects.filter(pk__in=event_ids))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def expire_category_cards(sender, instance, **kwargs):
+    bump_category_version(instance.pk)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def expire_listing_pages(sender, **kwargs):
+    bump_listing_version()
+
+
+@receiver(post_save, sender=Event)
+def prepare_event_image_derivatives(sender, instance, raw, **kwargs):
+    if raw or not instance.image:
+        return
+    category_id = instance.category_id
+
+    def expire_pages():
+        # Cards and listings rendered meanwhile show the original image.
+        bump_category_version(category_id)
+        bump_listing_version()
+
+    get_manifest(instance.image.name, on_done=expire_pages)
+
+
+@receiver(connection_created)
+def prepare_search_connection(sender, connection, **kwargs):
+    configure_connection(connection)
@@ -0,0 +1,155 @@
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from apps.events.models import RSVP, DashboardStats, Event
+
+STATS_PK = 1
+
+
+def _bucket(event_date, today):
+    if event_date is None:
+        return None
+    if event_date > today:
+        return "upcoming_events"
+    if event_date < today:
+        return "past_events"
+    return None
+
+
+def rebuild_dashboard_stats(today=None):
+    """Recount every statistic from the Event and RSVP tables."""
+    today = today or timezone.localdate()
+
+    with transaction.atomic():
+        counts = Event.objects.aggregate(
+            total_events=Count("id"),
+            upcoming_events=Count("id", filter=Q(event_date__gt=today)),
+            past_events=Count("id", filter=Q(event_date__lt=today)),
+        )
+        stats, _ = DashboardStats.objects.update_or_create(
+            pk=STATS_PK,
+            defaults={
+                **counts,
+                "total_rsvps": RSVP.objects.count(),
+                "as_of": today,
+            },
+        )
+    return stats
+
+
+def rollover_dashboard_stats(today=None):
+    """Move events whose date has arrived out of the upcoming bucket, and
+    events whose date has gone by into the past bucket."""
+    today = today or timezone.localdate()
+
+    with transaction.atomic():
+        stats = DashboardStats.objects.select_for_update().filter(pk=STATS_PK).first()
+
+        if stats is None or stats.as_of > today:
+            return rebuild_dashboard_stats(today)
+
+        if stats.as_of == today:
+            return stats
+
+        stats.upcoming_events -= Event.objects.filter(
+            event_date__gt=stats.as_of, event_date__lte=today
+        ).count()
+        stats.past_events += Event.objects.filter(
+            event_date__gte=stats.as_of, event_date__lt=today
+        ).count()
+        stats.as_of = today
+        stats.save()
+    return stats
+
+
+def get_dashboard_stats():
+    stats = DashboardStats.objects.filter(pk=STATS_PK).first()
+    today = timezone.localdate()
+
+    if stats is None or stats.as_of != today:
+        return rollover_dashboard_stats(today)
+    return stats
+
+
+def _event_deltas(changes, day):
+    """The counter changes for ``(old_date, new_date)`` event changes, with
+    the buckets taken as of ``day``."""
+    deltas = {"total_events": 0, "upcoming_events": 0, "past_events": 0}
+    for old_date, new_date in changes:
+        deltas["total_events"] += (new_date is not None) - (old_date is not None)
+        old_bucket = _bucket(old_date, day)
+        new_bucket = _bucket(new_date, day)
+        if old_bucket != new_bucket:
+            if old_bucket:
+                deltas[old_bucket] -= 1
+            if new_bucket:
+                deltas[new_bucket] += 1
+    return deltas
+
+
+def _deltas(event_changes, rsvps, as_of):
+    deltas = {**_event_deltas(event_changes, as_of), "total_rsvps": rsvps}
+    return {field: delta for field, delta in deltas.items() if delta}
+
+
+def _update(as_of, deltas):
+    return DashboardStats.objects.filter(pk=STATS_PK, as_of=as_of).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def _moves_a_date(event_changes):
+    return any(
+        old_date and new_date and old_date != new_date
+        for old_date, new_date in event_changes
+    )
+
+
+def _is_current(today):
+    return DashboardStats.objects.filter(pk=STATS_PK, as_of=today).exists()
+
+
+def _apply(event_changes=(), rsvps=0):
+    today = timezone.localdate()
+    event_changes = list(event_changes)
+    deltas = _deltas(event_changes, rsvps, today)
+
+    if deltas:
+        if _update(today, deltas):
+            return
+    elif not _moves_a_date(event_changes) or _is_current(today):
+        # Nothing changes today's counts. Only a date moved within a bucket
+        # can still change those of a row that is not rolled over yet.
+        return
+
+    with transaction.atomic():
+        stats = DashboardStats.objects.select_for_update().filter(pk=STATS_PK).first()
+        if stats is None or stats.as_of > today:
+            # get_dashboard_stats() recounts before the row is next read. A
+            # recount here could not tell which changes it already includes,
+            # such as the rest of a bulk delete.
+            return
+
+        # Count the change as of the row's own day, which keeps the row true
+        # to the tables as of that day, then roll it over to today.
+        deltas = _deltas(event_changes, rsvps, stats.as_of)
+        if deltas:
+            _update(stats.as_of, deltas)
+        rollover_dashboard_stats(today)
+
+
+def record_event_change(old_date, new_date):
+    """Apply an event being created (``old_date`` is None), moved, or
+    deleted (``new_date`` is None) to the counters."""
+    _apply([(old_date, new_date)])
+
+
+def record_events_added(event_dates):
+    """Apply events inserted without signals, such as by ``bulk_create``,
+    to the counters in one update."""
+    _apply((None, event_date) for event_date in event_dates)
+
+
+def record_rsvp_change(delta):
+    _apply(rsvps=delta)
@@ -0,0 +1,1612 @@
+import csv
+import gzip
+import json
+import re
+import threading
+from io import BytesIO, StringIO
+from dataclasses import replace
+from datetime import date, time, timedelta
+from unittest import mock
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.http import QueryDict
+from django.template.loader import render_to_string
+from django.test import (
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.views import View
+
+from apps.core.asyncviews import gather_queries
+from apps.core.context_processors import user_roles_context
+from apps.core.exports import ExportMixin
+from apps.events.cards import CSRF_SENTINEL, render_event_cards
+from apps.events.filters import DashboardFilters, facet_counts
+from apps.events.imports import import_events, read_rows
+from apps.events.models import RSVP, Category, DashboardStats, Event, EventNotice
+from apps.events.notifications import send_notice
+from apps.events.pagination import TimelinePaginator, encode_cursor
+from apps.events.search import search_events, update_search_vectors
+from apps.events.stats import (
+    get_dashboard_stats,
+    rebuild_dashboard_stats,
+    rollover_dashboard_stats,
+)
+from apps.events.views import (
+    EVENT_LIST_SORTS,
+    AsyncDashboardView,
+    AsyncRSVPView,
+    AsyncViewAllView,
+    DashboardView,
+    RSVPEventView,
+    RSVPView,
+    ViewAllView,
+)
+
+User = get_user_model()
+
+
+class QueryPlanTests(TestCase):
+    """Run EXPLAIN on the hot query shapes against a seeded database and fail
+    when any of them falls back to scanning a whole table.
+
+    Listings that read every row by design (the unfiltered dashboard, the
+    ViewAllView pages) are not covered here.
+    """
+
+    EVENT_COUNT = 3000
+    CATEGORY_COUNT = 30
+    USER_COUNT = 60
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        categories = Category.objects.bulk_create(
+            Category(name=f"Category {i}") for i in range(cls.CATEGORY_COUNT)
+        )
+        Event.objects.bulk_create(
+            Event(
+                name=f"Event {i}",
+                event_date=cls.today + timedelta(days=i % 1500 - 750),
+                event_time=time(10),
+                location=f"Hall {i % 40}",
+                category=categories[i % cls.CATEGORY_COUNT],
+            )
+            for i in range(cls.EVENT_COUNT)
+        )
+        users = User.objects.bulk_create(
+            User(username=f"user{i}", email=f"user{i}@example.com")
+            for i in range(cls.USER_COUNT)
+        )
+        event_ids = list(Event.objects.values_list("id", flat=True)[:300])
+        RSVP.objects.bulk_create(
+            RSVP(user=user, event_id=event_id)
+            for index, user in enumerate(users)
+            for event_id in event_ids[index * 5 : index * 5 + 5]
+        )
+        cls.category = categories[0]
+        cls.user = users[0]
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def dashboard_queryset(self, **params):
+        request = RequestFactory().get("/events/dashboard/", params)
+        request.user = self.user
+        view = DashboardView()
+        view.setup(request)
+        return view.get_queryset()
+
+    def explain(self, queryset):
+        if connection.vendor == "postgresql":
+            # With sequential scans priced out, the planner only picks one
+            # when no index can answer the query.
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                return queryset.explain()
+        return queryset.explain()
+
+    def assertNoFullScan(self, queryset):
+        plan = self.explain(queryset)
+        if connection.vendor == "postgresql":
+            full_scan = re.search(r"Seq Scan on (\w+)", plan)
+        else:
+            full_scan = re.search(r"\bSCAN (\w+)", plan)
+        self.assertIsNone(
+            full_scan,
+            f"Query scans all of {full_scan and full_scan.group(1)}:\n{plan}",
+        )
+
+    def assertWalksIndex(self, queryset):
+        """Fail unless the rows come back in index order, so the database can
+        stop at the LIMIT instead of sorting every match first. A sort on
+        just the ``id`` tiebreaker within each date is allowed."""
+        self.assertNoFullScan(queryset)
+        plan = self.explain(queryset)
+        if connection.vendor == "postgresql":
+            full_sort = re.search(r"(?<!Incremental )\bSort  \(", plan)
+        else:
+            full_sort = re.search(r"TEMP B-TREE FOR ORDER BY", plan)
+        self.assertIsNone(full_sort, f"Query sorts every match:\n{plan}")
+
+    def timeline_querysets(self, queryset, date_field="event_date", **cursor):
+        paginator = TimelinePaginator(queryset, 12, self.today, date_field)
+        return [qs[:13] for qs in paginator.range_querysets(**cursor)]
+
+    def test_todays_events(self):
+        self.assertNoFullScan(Event.objects.filter(event_date=self.today))
+
+    def test_dashboard_category_filter(self):
+        self.assertNoFullScan(
+            self.dashboard_queryset(type="category", id=self.category.pk)
+        )
+
+    def test_dashboard_date_range_filter(self):
+        self.assertNoFullScan(
+            self.dashboard_queryset(
+                **{
+                    "type": "date-range",
+                    "date-from": self.today.isoformat(),
+                    "date-to": (self.today + timedelta(days=7)).isoformat(),
+                }
+            )
+        )
+
+    def test_dashboard_upcoming_events(self):
+        self.assertNoFullScan(self.dashboard_queryset(type="upcoming_events"))
+
+    def test_dashboard_past_events(self):
+        self.assertNoFullScan(self.dashboard_queryset(type="past_events"))
+
+    def test_dashboard_combined_filters(self):
+        self.assertNoFullScan(
+            self.dashboard_queryset(
+                category=self.category.pk,
+                when="upcoming",
+                **{"date-to": (self.today + timedelta(days=60)).isoformat()},
+            )
+        )
+
+    def test_dashboard_timeline(self):
+        for queryset in self.timeline_querysets(self.dashboard_queryset()):
+            self.assertWalksIndex(queryset)
+
+    def test_dashboard_timeline_category(self):
+        queryset = self.dashboard_queryset(type="category", id=self.category.pk)
+        for queryset in self.timeline_querysets(queryset):
+            self.assertWalksIndex(queryset)
+
+    def test_dashboard_timeline_cursors(self):
+        past = Event.objects.filter(event_date__lt=self.today).first()
+        for cursor in ("after", "before"):
+            querysets = self.timeline_querysets(
+                self.dashboard_queryset(),
+                **{cursor: encode_cursor(past.event_date, past.pk)},
+            )
+            for queryset in querysets:
+                self.assertWalksIndex(queryset)
+
+    def test_rsvp_view(self):
+        request = RequestFactory().get("/events/rsvp-view/")
+        request.user = self.user
+        view = RSVPView()
+        view.setup(request)
+        self.assertNoFullScan(view.get_queryset())
+
+    def test_rsvps_for_event(self):
+        event = Event.objects.first()
+        self.assertNoFullScan(RSVP.objects.filter(event=event))
+
+    def test_latest_rsvps_for_user(self):
+        self.assertNoFullScan(
+            RSVP.objects.filter(user=self.user).order_by("-created_at")[:10]
+        )
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """Request each page with QUERY_BUDGET_STRICT on, so a view that runs
+    more queries than its ``query_budget`` fails the test."""
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        categories = Category.objects.bulk_create(
+            Category(name=f"Category {i}") for i in range(5)
+        )
+        Event.objects.bulk_create(
+            Event(
+                name=f"Event {i}",
+                event_date=today + timedelta(days=i - 25),
+                event_time=time(10),
+                location=f"Hall {i % 4}",
+                category=categories[i % 5],
+            )
+            for i in range(50)
+        )
+        cls.event = Event.objects.first()
+        cls.organizer = User.objects.create(username="organizer")
+        cls.organizer.groups.set([Group.objects.create(name="Organizer")])
+        cls.participant = User.objects.create(username="participant")
+        cls.participant.groups.set([Group.objects.get_or_create(name="Participant")[0]])
+        RSVP.objects.bulk_create(
+            RSVP(user=cls.participant, event=event)
+            for event in Event.objects.all()[:10]
+        )
+        rebuild_dashboard_stats()
+
+    def setUp(self):
+        self.client.force_login(self.organizer)
+
+    def assertWithinBudget(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Server-Timing", response)
+
+    def test_view_all_events(self):
+        self.assertWithinBudget(reverse("events:view-all"))
+
+    def test_view_all_categories(self):
+        self.assertWithinBudget(reverse("events:view-all") + "?type=category")
+
+    def test_create_form(self):
+        self.assertWithinBudget(reverse("events:create-form"))
+
+    def test_update_form(self):
+        self.assertWithinBudget(reverse("events:update-form", args=[self.event.pk]))
+
+    def test_dashboard(self):
+        self.assertWithinBudget(reverse("events:dashboard"))
+
+    def test_dashboard_next_page(self):
+        response = self.client.get(reverse("events:dashboard"))
+        self.assertWithinBudget(
+            reverse("events:dashboard") + "?" + response.context["page_obj"].next_query
+        )
+
+    def test_rsvp_view(self):
+        self.client.force_login(self.participant)
+        self.assertWithinBudget(reverse("events:rsvp-view"))
+
+    def test_dashboard_results_fragment(self):
+        url = reverse("events:dashboard") + "?type=upcoming_events"
+        with CaptureQueriesContext(connection) as page_queries:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as fragment_queries:
+            response = self.client.get(url, headers={"X-Partial": "results"})
+
+        self.assertTemplateUsed(response, "partials/dashboard-results.html")
+        self.assertTemplateNotUsed(response, "dashboard.html")
+        self.assertLess(len(fragment_queries), len(page_queries))
+        self.assertIn("X-Partial", response["Vary"])
+
+        response = self.client.get(url + "&partial=results")
+        self.assertTemplateNotUsed(response, "dashboard.html")
+        self.assertNotIn("partial", response.context["page_obj"].next_query)
+
+
+class TimelinePaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        # Created latest date first, so ids run against the date order, with
+        # up to three events sharing a date.
+        Event.objects.bulk_create(
+            Event(
+                name=f"Event {offset}.{n}",
+                event_date=cls.today + timedelta(days=offset),
+                event_time=time(10),
+                location="Hall",
+            )
+            for offset in range(6, -7, -1)
+            for n in range(offset % 3 + 1)
+        )
+        events = list(Event.objects.all())
+        upcoming = sorted(
+            (event for event in events if event.event_date >= cls.today),
+            key=lambda event: (event.event_date, event.pk),
+        )
+        past = sorted(
+            (event for event in events if event.event_date < cls.today),
+            key=lambda event: (-event.event_date.toordinal(), event.pk),
+        )
+        cls.expected = upcoming + past
+
+    def paginator(self, per_page):
+        return TimelinePaginator(Event.objects.all(), per_page, self.today)
+
+    def test_walk_forward(self):
+        for per_page in (1, 4, 5, len(self.expected), len(self.expected) + 1):
+            with self.subTest(per_page=per_page):
+                paginator = self.paginator(per_page)
+                page = paginator.page()
+                self.assertFalse(page.has_previous())
+                events = list(page)
+                while page.has_next():
+                    page = paginator.page(after=page.next_cursor)
+                    self.assertTrue(page.has_previous())
+                    self.assertLessEqual(len(page), per_page)
+                    events.extend(page)
+                self.assertEqual(events, self.expected)
+
+    def test_walk_back(self):
+        for per_page in (1, 4, 5):
+            with self.subTest(per_page=per_page):
+                paginator = self.paginator(per_page)
+                page = paginator.page()
+                while page.has_next():
+                    page = paginator.page(after=page.next_cursor)
+
+                events = list(page)
+                while page.has_previous():
+                    page = paginator.page(before=page.previous_cursor)
+                    self.assertEqual(len(page), per_page)
+                    self.assertTrue(page.has_next())
+                    events[:0] = page
+                self.assertEqual(events, self.expected)
+
+    def test_rsvps_by_event_date(self):
+        user = User.objects.create(username="guest")
+        RSVP.objects.bulk_create(
+            RSVP(user=user, event=event) for event in self.expected
+        )
+        paginator = TimelinePaginator(
+            RSVP.objects.select_related("event"), 4, self.today, "event__event_date"
+        )
+        page = paginator.page()
+        events = [rsvp.event for rsvp in page]
+        while page.has_next():
+            page = paginator.page(after=page.next_cursor)
+            events.extend(rsvp.event for rsvp in page)
+        self.assertEqual(events, self.expected)
+
+    def test_invalid_cursor_shows_the_first_page(self):
+        self.client.force_login(User.objects.create(username="viewer"))
+        url = reverse("events:dashboard")
+        first = list(self.client.get(url).context["events"])
+        self.assertEqual(first, self.expected[: DashboardView.paginate_by])
+
+        for params in (
+            {"after": "not-a-cursor"},
+            {"before": "%%%"},
+            {"after": encode_cursor(self.today, 1)[:-2]},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(list(response.context["events"]), first)
+
+
+class DashboardFilterTests(TestCase):
+    """Combined dashboard filters and their facet counts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        cls.categories = Category.objects.bulk_create(
+            Category(name=f"Category {i}") for i in range(3)
+        )
+        Event.objects.bulk_create(
+            Event(
+                name=f"{'Concert' if i % 2 else 'Lecture'} {i}",
+                event_date=cls.today + timedelta(days=i % 21 - 10),
+                event_time=time(10),
+                location=f"Hall {i % 4}",
+                category=cls.categories[i % 3],
+            )
+            for i in range(60)
+        )
+
+    def filters(self, **params):
+        return DashboardFilters.from_query(QueryDict(urlencode(params)))
+
+    def matching(self, filters, exclude=()):
+        events = Event.objects.all()
+        return set(
+            filters.apply(events, self.today, exclude).values_list("id", flat=True)
+        )
+
+    def test_filters_combine(self):
+        filters = self.filters(
+            q="concert",
+            category=self.categories[1].pk,
+            when="upcoming",
+            **{"date-to": (self.today + timedelta(days=5)).isoformat()},
+        )
+        expected = {
+            event.pk
+            for event in Event.objects.all()
+            if "Concert" in event.name
+            and event.category_id == self.categories[1].pk
+            and self.today < event.event_date <= self.today + timedelta(days=5)
+        }
+        self.assertTrue(expected)
+        self.assertEqual(self.matching(filters), expected)
+
+    def test_legacy_links(self):
+        category = self.categories[0].pk
+        self.assertEqual(
+            self.filters(type="category", id=category),
+            DashboardFilters(category=category),
+        )
+        self.assertEqual(
+            self.filters(type="search", **{"search-value": " concert "}),
+            DashboardFilters(q="concert"),
+        )
+        self.assertEqual(
+            self.filters(type="past_events"), DashboardFilters(when="past")
+        )
+        self.assertEqual(
+            self.filters(category="x", when="soon", **{"date-from": "nope"}),
+            DashboardFilters(),
+        )
+        for category in ("²", "٣", "-1", " 1", "1.0"):
+            with self.subTest(category=category):
+                self.assertEqual(self.filters(category=category), DashboardFilters())
+                self.assertEqual(
+                    self.filters(type="category", id=category), DashboardFilters()
+                )
+
+    def test_facet_counts(self):
+        filters = self.filters(q="lecture", category=self.categories[2].pk, when="past")
+        with self.assertNumQueries(1):
+            facets = facet_counts(Event.objects.all(), filters, self.today)
+
+        for facet in facets["categories"]:
+            expected = self.matching(replace(filters, category=facet["id"]))
+            self.assertEqual(facet["count"], len(expected), facet["name"])
+        for facet in facets["when"]:
+            expected = self.matching(replace(filters, when=facet["value"]))
+            self.assertEqual(facet["count"], len(expected), facet["label"])
+        self.assertEqual(
+            [facet["selected"] for facet in facets["when"]], [False, False, True]
+        )
+
+    def test_selected_category_without_matches(self):
+        empty = Category.objects.create(name="Empty")
+        filters = self.filters(category=empty.pk, when="upcoming")
+        facets = facet_counts(Event.objects.all(), filters, self.today)
+
+        selected = [facet for facet in facets["categories"] if facet["selected"]]
+        self.assertEqual(
+            selected,
+            [
+                {
+                    "id": empty.pk,
+                    "name": "Empty",
+                    "count": 0,
+                    "selected": True,
+                    "query": filters.query(),
+                }
+            ],
+        )
+        self.assertEqual(len(facets["categories"]), 4)
+        self.assertEqual([facet["count"] for facet in facets["when"]], [0, 0, 0])
+
+        # A deleted category has nothing to show.
+        filters = self.filters(category=empty.pk + 1)
+        facets = facet_counts(Event.objects.all(), filters, self.today)
+        self.assertFalse(any(facet["selected"] for facet in facets["categories"]))
+
+
+class DashboardStatsTests(TestCase):
+    """The counters kept by the signals and the daily rollover must always
+    match a recount."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        Event.objects.bulk_create(
+            Event(
+                name=f"Event {offset}",
+                event_date=cls.today + timedelta(days=offset),
+                event_time=time(10),
+                location="Hall",
+            )
+            for offset in range(-5, 6)
+            for _ in range(abs(offset) % 2 + 1)
+        )
+
+    def counts(self, stats):
+        return {
+            "total_events": stats.total_events,
+            "upcoming_events": stats.upcoming_events,
+            "past_events": stats.past_events,
+            "as_of": stats.as_of,
+        }
+
+    def expected(self):
+        dates = list(Event.objects.values_list("event_date", flat=True))
+        return {
+            "total_events": len(dates),
+            "upcoming_events": sum(day > self.today for day in dates),
+            "past_events": sum(day < self.today for day in dates),
+            "as_of": self.today,
+        }
+
+    def stored(self):
+        return self.counts(DashboardStats.objects.get())
+
+    def days(self, n):
+        return self.today + timedelta(days=n)
+
+    def test_rollover_across_several_days(self):
+        rebuild_dashboard_stats(self.days(-4))
+        rollover_dashboard_stats(self.days(-2))
+        self.assertEqual(self.stored()["as_of"], self.days(-2))
+        rollover_dashboard_stats(self.today)
+        self.assertEqual(self.stored(), self.expected())
+
+        rebuild_dashboard_stats(self.days(-5))
+        self.assertEqual(self.counts(get_dashboard_stats()), self.expected())
+
+    def test_as_of_in_the_future(self):
+        # The clock went back: the row cannot be rolled backwards.
+        rebuild_dashboard_stats(self.days(3))
+        self.assertEqual(self.counts(get_dashboard_stats()), self.expected())
+
+        rebuild_dashboard_stats(self.days(3))
+        Event.objects.filter(event_date=self.days(1)).delete()
+        self.assertEqual(self.stored()["as_of"], self.days(3))
+        self.assertEqual(self.counts(get_dashboard_stats()), self.expected())
+
+    def test_moving_events_between_buckets(self):
+        rebuild_dashboard_stats(self.today)
+        event = Event.objects.filter(event_date__gt=self.today).first()
+
+        for offset in (-3, 0, 4, -1):
+            event.event_date = self.days(offset)
+            event.save()
+            self.assertEqual(self.stored(), self.expected(), offset)
+
+        event.delete()
+        self.assertEqual(self.stored(), self.expected())
+
+    def test_change_on_a_stale_row_rolls_it_over(self):
+        with mock.patch(
+            "apps.events.stats.rebuild_dashboard_stats",
+            wraps=rebuild_dashboard_stats,
+        ) as rebuild:
+            rebuild_dashboard_stats(self.days(-3))
+            # Upcoming as of the row's day but past now.
+            Event.objects.create(
+                name="New",
+                event_date=self.days(-1),
+                event_time=time(10),
+                location="Hall",
+            )
+            self.assertEqual(self.stored(), self.expected())
+
+            rebuild_dashboard_stats(self.days(-3))
+            event = Event.objects.filter(event_date=self.days(-4)).first()
+            event.event_date = self.days(-2)
+            event.save()
+            self.assertEqual(self.stored(), self.expected())
+        rebuild.assert_not_called()
+
+    def test_changes_without_a_row_are_left_to_the_recount(self):
+        DashboardStats.objects.all().delete()
+        with mock.patch("apps.events.stats.rebuild_dashboard_stats") as rebuild:
+            Event.objects.create(
+                name="New",
+                event_date=self.days(2),
+                event_time=time(10),
+                location="Hall",
+            )
+            Event.objects.filter(event_date=self.days(-5)).delete()
+        rebuild.assert_not_called()
+        self.assertFalse(DashboardStats.objects.exists())
+        self.assertEqual(self.counts(get_dashboard_stats()), self.expected())
+
+
+class EventCardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        cls.music = Category.objects.create(name="Music")
+        cls.talks = Category.objects.create(name="Talks")
+        Event.objects.bulk_create(
+            Event(
+                name=f"Event {i}",
+                event_date=cls.today + timedelta(days=i + 1),
+                event_time=time(10),
+                location="Hall",
+                category=cls.music if i % 2 else cls.talks,
+            )
+            for i in range(6)
+        )
+        cls.organizer = User.objects.create(username="organizer")
+        cls.organizer.groups.set([Group.objects.create(name="Organizer")])
+        cls.participant = User.objects.create(username="participant")
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, user=None):
+        """The cards for every event, and how many were rendered afresh."""
+        request = RequestFactory().get("/")
+        request.user = User.objects.get(pk=(user or self.organizer).pk)
+        events = Event.objects.select_related("category").order_by("pk")
+        with mock.patch(
+            "apps.events.cards.render_to_string", wraps=render_to_string
+        ) as render:
+            cards = render_event_cards(request, events, self.today)
+        return cards, render.call_count
+
+    def test_cards_are_reused(self):
+        cards, rendered = self.render()
+        self.assertEqual(rendered, 6)
+        self.assertEqual(self.render(), (cards, 0))
+
+    def test_saving_an_event_renders_its_card_again(self):
+        self.render()
+        event = Event.objects.order_by("pk").first()
+        event.name = "Renamed event"
+        event.save()
+
+        cards, rendered = self.render()
+        self.assertEqual(rendered, 1)
+        self.assertIn("Renamed event", cards[0])
+
+    def test_renaming_a_category_renders_its_cards_again(self):
+        self.render()
+        self.music.name = "Concerts"
+        self.music.save()
+
+        cards, rendered = self.render()
+        self.assertEqual(rendered, 3)
+        self.assertEqual(sum("Category : Concerts" in card for card in cards), 3)
+        self.assertEqual(sum("Category : Talks" in card for card in cards), 3)
+
+    def test_participants_get_their_own_cards(self):
+        organizer_cards, _ = self.render()
+        participant_cards, rendered = self.render(self.participant)
+        self.assertEqual(rendered, 6)
+        for organizer_card, participant_card in zip(organizer_cards, participant_cards):
+            self.assertNotIn("csrfmiddlewaretoken", organizer_card)
+            self.assertIn("csrfmiddlewaretoken", participant_card)
+            self.assertNotIn(CSRF_SENTINEL, participant_card)
+        self.assertEqual(self.render(self.participant)[1], 0)
+        self.assertEqual(self.render()[1], 0)
+
+
+class AsyncViewTests(TestCase):
+    """The async listing views must give the same pages as the sync ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        categories = Category.objects.bulk_create(
+            Category(name=f"Category {i}") for i in range(3)
+        )
+        Event.objects.bulk_create(
+            Event(
+                name=f"Event {i}",
+                event_date=today + timedelta(days=i % 30 - 15),
+                event_time=time(10),
+                location=f"Hall {i % 4}",
+                category=categories[i % 3],
+            )
+            for i in range(40)
+        )
+        cls.category = categories[0]
+        cls.organizer = User.objects.create(username="organizer")
+        cls.organizer.groups.set([Group.objects.create(name="Organizer")])
+        cls.participant = User.objects.create(username="participant")
+        cls.participant.groups.set([Group.objects.get_or_create(name="Participant")[0]])
+        RSVP.objects.bulk_create(
+            RSVP(user=cls.participant, event=event)
+            for event in Event.objects.all()[:15]
+        )
+        rebuild_dashboard_stats()
+
+    def request(self, user, **params):
+        request = RequestFactory().get("/", params)
+        request.user = user
+
+        async def auser():
+            return user
+
+        request.auser = auser
+        return request
+
+    def responses(self, sync_view, async_view, user, **params):
+        sync_response = sync_view.as_view()(self.request(user, **params))
+        async_response = async_to_sync(async_view.as_view())(
+            self.request(user, **params)
+        )
+        return sync_response.context_data, async_response.context_data
+
+    def test_dashboard(self):
+        for params in ({}, {"type": "category", "id": self.category.pk}):
+            sync, async_ = self.responses(
+                DashboardView, AsyncDashboardView, self.organizer, **params
+            )
+            for name in ("events", "today"):
+                self.assertEqual(list(sync[name]), list(async_[name]), name)
+            self.assertEqual(sync["count"], async_["count"])
+            self.assertEqual(sync["facets"], async_["facets"])
+            self.assertEqual(sync["page_obj"].next_query, async_["page_obj"].next_query)
+
+    def test_rsvp_view(self):
+        sync, async_ = self.responses(RSVPView, AsyncRSVPView, self.participant)
+        self.assertEqual(list(sync["rsvps"]), list(async_["rsvps"]))
+
+    def test_rsvp_view_denied(self):
+        response = async_to_sync(AsyncRSVPView.as_view())(self.request(self.organizer))
+        self.assertRedirects(
+            response, reverse("core:no-permission"), fetch_redirect_response=False
+        )
+
+    def test_view_all_events(self):
+        request = self.request(self.organizer, category=self.category.pk)
+        sync_view, async_view = ViewAllView(), AsyncViewAllView()
+        for view in (sync_view, async_view):
+            view.setup(request)
+        params = sync_view.event_list_params()
+
+        sync = sync_view.run_queries(sync_view.event_list_queries(params))
+        async_ = async_view.run_queries(async_view.event_list_queries(params))
+        self.assertEqual(
+            list(sync["page_obj"].object_list), list(async_["page_obj"].object_list)
+        )
+        self.assertEqual(sync["categories"], async_["categories"])
+
+
+class PooledQueryTests(TransactionTestCase):
+    """Outside a transaction gather_queries runs each callable on the pool,
+    on that thread's own connection."""
+
+    def setUp(self):
+        today = timezone.localdate()
+        self.category = Category.objects.create(name="Music")
+        Event.objects.bulk_create(
+            Event(
+                name=f"Event {i}",
+                event_date=today + timedelta(days=i),
+                event_time=time(10),
+                location="Hall",
+                category=self.category if i % 2 else None,
+            )
+            for i in range(10)
+        )
+        self.organizer = User.objects.create(username="organizer")
+        self.organizer.groups.set([Group.objects.create(name="Organizer")])
+        self.runs = []
+
+    def counted(self, query):
+        def run():
+            with CaptureQueriesContext(connection) as queries:
+                result = query()
+            self.runs.append((threading.current_thread().name, len(queries)))
+            return result
+
+        return run
+
+    def test_results_and_query_counts(self):
+        queries = {
+            "events": lambda: list(Event.objects.order_by("pk")),
+            "count": lambda: Event.objects.filter(category=self.category).count(),
+            "names": lambda: list(Category.objects.values_list("name", flat=True)),
+        }
+        with CaptureQueriesContext(connection) as caller_queries:
+            results = async_to_sync(gather_queries)(
+                {name: self.counted(query) for name, query in queries.items()}
+            )
+
+        self.assertEqual(results["events"], list(Event.objects.order_by("pk")))
+        self.assertEqual(results["count"], 5)
+        self.assertEqual(results["names"], ["Music"])
+        self.assertEqual(len(caller_queries), 0)
+        self.assertEqual(len(self.runs), 3)
+        for thread_name, count in self.runs:
+            self.assertTrue(thread_name.startswith("async-queries"), thread_name)
+            self.assertEqual(count, 1)
+
+    def test_view_all_events(self):
+        request = RequestFactory().get("/", {"category": self.category.pk})
+        request.user = self.organizer
+        sync_view, async_view = ViewAllView(), AsyncViewAllView()
+        for view in (sync_view, async_view):
+            view.setup(request)
+        params = sync_view.event_list_params()
+
+        with CaptureQueriesContext(connection) as sync_queries:
+            sync = sync_view.run_queries(sync_view.event_list_queries(params))
+        queries = async_view.event_list_queries(params)
+        async_ = async_view.run_queries(
+            {name: self.counted(query) for name, query in queries.items()}
+        )
+
+        self.assertEqual(
+            list(sync["page_obj"].object_list), list(async_["page_obj"].object_list)
+        )
+        self.assertEqual(sync["categories"], async_["categories"])
+        self.assertEqual(sum(count for _, count in self.runs), len(sync_queries))
+        self.assertTrue(all(name.startswith("async-queries") for name, _ in self.runs))
+
+
+class RSVPEventViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(
+            name="Jazz Night",
+            event_date=timezone.localdate() + timedelta(days=7),
+            event_time=time(19),
+            location="Riverside Hall",
+        )
+        cls.participant = User.objects.create(
+            username="participant", email="participant@example.com"
+        )
+        rebuild_dashboard_stats()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_roles_are_loaded_once_per_request(self):
+        # test_func, the view's own check and the context processor share a
+        # single group query.
+        request = RequestFactory().post("/")
+        request.user = User.objects.get(pk=self.participant.pk)
+        request._messages = CookieStorage(request)
+
+        # Roles, the event, the RSVP lookup and insert in a savepoint, the
+        # queued confirmation email and the RSVP counter.
+        with self.assertNumQueries(8) as queries:
+            response = RSVPEventView.as_view()(request, event_id=self.event.pk)
+            context = user_roles_context(request)
+
+        self.assertEqual(
+            sum("auth_group" in query["sql"] for query in queries.captured_queries), 1
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(RSVP.objects.filter(user=self.participant).exists())
+        self.assertTrue(context["user_roles"]["is_participant"])
+
+
+class SearchTests(TestCase):
+    """search_events on whichever backend the tests run against."""
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        music = Category.objects.create(name="Music")
+        talks = Category.objects.create(name="Talks")
+        events = Event.objects.bulk_create(
+            [
+                Event(
+                    name="Jazz Night",
+                    description="Live quartet on the terrace.",
+                    event_date=today,
+                    event_time=time(10),
+                    location="Riverside Hall",
+                    category=music,
+                ),
+                Event(
+                    name="Evening Social",
+                    description="Drinks, then a short jazz set.",
+                    event_date=today,
+                    event_time=time(10),
+                    location="Old Library",
+                    category=talks,
+                ),
+                Event(
+                    name="Developer Conference",
+                    description="Talks on web frameworks.",
+                    event_date=today,
+                    event_time=time(10),
+                    location="Convention Centre",
+                    category=talks,
+                ),
+                Event(
+                    name="Poetry Reading",
+                    description="Open mic.",
+                    event_date=today,
+                    event_time=time(10),
+                    location="Old Library",
+                    category=talks,
+                ),
+            ]
+        )
+        update_search_vectors(Event.objects.all())
+        cls.jazz, cls.social, cls.conference, cls.poetry = events
+
+    def search(self, query):
+        return list(search_events(Event.objects.all(), query))
+
+    def test_prefix_match(self):
+        self.assertEqual(self.search("conf"), [self.conference])
+        self.assertEqual(self.search("devel conf"), [self.conference])
+
+    def test_typo(self):
+        self.assertEqual(self.search("confrence"), [self.conference])
+        self.assertEqual(self.search("riversde"), [self.jazz])
+
+    def test_ranked_results_are_paginated(self):
+        today = timezone.localdate()
+        Event.objects.bulk_create(
+            Event(
+                name=f"Jazz Jam {i}",
+                event_date=today + timedelta(days=i),
+                event_time=time(10),
+                location="Cellar",
+            )
+            for i in range(DashboardView.paginate_by * 2)
+        )
+        update_search_vectors(Event.objects.all())
+        expected = self.search("jazz")
+        self.assertGreater(len(expected), DashboardView.paginate_by * 2)
+
+        self.client.force_login(User.objects.create(username="viewer"))
+        url = reverse("events:dashboard")
+        response = self.client.get(url, {"q": "jazz"})
+        self.assertFalse(response.context["page_obj"].has_previous())
+        events = list(response.context["events"])
+        while response.context["page_obj"].has_next():
+            response = self.client.get(
+                f"{url}?{response.context['page_obj'].next_query}"
+            )
+            self.assertTrue(response.context["page_obj"].has_previous())
+            events.extend(response.context["events"])
+        self.assertEqual(events, expected)
+
+        # Past the last page, or not a page number: the first page.
+        for page in ("99", "0", "x", "²"):
+            with self.subTest(page=page):
+                response = self.client.get(url, {"q": "jazz", "page": page})
+                self.assertEqual(
+                    list(response.context["events"]),
+                    expected[: DashboardView.paginate_by],
+                )
+
+    def test_deleting_a_category_refreshes_only_its_events(self):
+        loose = Event.objects.create(
+            name="Pop-up Market",
+            event_date=timezone.localdate(),
+            event_time=time(10),
+            location="Square",
+        )
+        talks = self.social.category
+        self.assertIn(self.poetry, self.search("talks"))
+        with mock.patch(
+            "apps.events.signals.update_search_vectors", wraps=update_search_vectors
+        ) as update:
+            talks.delete()
+        (queryset,), _ = update.call_args
+        self.assertEqual(
+            set(queryset.values_list("id", flat=True)),
+            {self.social.pk, self.conference.pk, self.poetry.pk},
+        )
+        self.assertNotIn(loose.pk, queryset.values_list("id", flat=True))
+        self.assertNotIn(self.poetry, self.search("talks"))
+
+    def test_name_ranks_above_description(self):
+        self.assertEqual(self.search("jazz"), [self.jazz, self.social])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search("jazz terrace"), [self.jazz])
+        self.assertEqual(self.search("  "), [])
+
+    def test_new_connections_are_configured(self):
+        new_connection = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with new_connection.cursor() as cursor:
+                if new_connection.vendor == "postgresql":
+                    cursor.execute("SHOW pg_trgm.word_similarity_threshold")
+                    self.assertEqual(
+                        float(cursor.fetchone()[0]),
+                        settings.EVENT_SEARCH_TRIGRAM_THRESHOLD,
+                    )
+                else:
+                    cursor.execute(
+                        "SELECT WORD_SIMILARITY(%s, %s), WORD_SIMILARITY(%s, %s)",
+                        ["riversde", "Riverside Hall", "poetry", "Riverside Hall"],
+                    )
+                    similar, unrelated = cursor.fetchone()
+                    self.assertGreaterEqual(
+                        similar, settings.EVENT_SEARCH_TRIGRAM_THRESHOLD
+                    )
+                    self.assertEqual(unrelated, 0.0)
+        finally:
+            new_connection.close()
+
+
+class EventNoticeTests(TestCase):
+    """Change and cancellation notices, and the RSVP counter they share
+    deletions with."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Music")
+        cls.event = Event.objects.create(
+            name="Jazz Night",
+            event_date=timezone.localdate() + timedelta(days=7),
+            event_time=time(19),
+            location="Riverside Hall",
+            category=cls.category,
+        )
+        cls.users = [
+            User.objects.create(username=f"guest{i}", email=f"guest{i}@example.com")
+            for i in range(3)
+        ]
+        cls.users.append(User.objects.create(username="no-email", email=""))
+        for user in cls.users:
+            RSVP.objects.create(user=user, event=cls.event)
+        rebuild_dashboard_stats()
+
+    def send_notices(self):
+        call_command(
+            "send_event_notices", "--once", stdout=StringIO(), stderr=StringIO()
+        )
+
+    def total_rsvps(self):
+        return DashboardStats.objects.get().total_rsvps
+
+    def test_change_fans_out_to_attendees(self):
+        self.event.name = "Jazz Evening"
+        self.event.save()
+        self.assertFalse(EventNotice.objects.exists())
+
+        self.event.location = "Old Library"
+        self.event.save()
+        notice = EventNotice.objects.get()
+        self.assertEqual(notice.kind, EventNotice.CHANGED)
+        self.assertIn("Riverside Hall → Old Library", notice.body)
+        self.assertEqual(notice.recipients.count(), len(self.users))
+
+        # One read, one update per batch and one to mark it complete.
+        with self.assertNumQueries(4):
+            sent = send_notice(notice, batch_size=2)
+        self.assertEqual(sent, 3)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            [f"guest{i}@example.com" for i in range(3)],
+        )
+        self.assertEqual(notice.recipients.filter(sent_at__isnull=True).count(), 1)
+        self.assertIsNotNone(notice.completed_at)
+
+    def test_cancellation(self):
+        self.event.delete()
+
+        notice = EventNotice.objects.get()
+        self.assertEqual(notice.kind, EventNotice.CANCELLED)
+        self.assertIsNone(notice.event)
+        self.assertEqual(notice.recipients.count(), len(self.users))
+        self.assertEqual(self.total_rsvps(), 0)
+
+        self.send_notices()
+        notice.refresh_from_db()
+        self.assertIsNotNone(notice.completed_at)
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(
+        EMAIL_BACKEND="apps.core.tests.FailingEmailBackend",
+        EVENT_NOTICE_MAX_ATTEMPTS=2,
+    )
+    def test_failing_notice_is_dead_lettered(self):
+        self.users[0].email = "guest@fail.test"
+        self.users[0].save()
+        self.event.location = "Old Library"
+        self.event.save()
+
+        self.send_notices()
+        notice = EventNotice.objects.get()
+        self.assertEqual(notice.attempts, 1)
+        self.assertIsNone(notice.failed_at)
+        self.assertIn("Mailbox unavailable", notice.last_error)
+        self.assertGreater(notice.next_attempt_at, timezone.now())
+
+        # Not retried before its backoff has passed.
+        self.send_notices()
+        notice.refresh_from_db()
+        self.assertEqual(notice.attempts, 1)
+
+        EventNotice.objects.update(next_attempt_at=timezone.now())
+        self.send_notices()
+        notice.refresh_from_db()
+        self.assertEqual(notice.attempts, 2)
+        self.assertIsNotNone(notice.failed_at)
+        self.assertIsNone(notice.completed_at)
+
+        self.send_notices()
+        notice.refresh_from_db()
+        self.assertEqual(notice.attempts, 2)
+
+    def test_rsvp_counter(self):
+        self.assertEqual(self.total_rsvps(), 4)
+
+        RSVP.objects.filter(user__in=self.users[:2]).delete()
+        self.assertEqual(self.total_rsvps(), 2)
+
+        RSVP.objects.filter(user=self.users[2]).get().delete()
+        self.assertEqual(self.total_rsvps(), 1)
+
+        self.users[3].delete()
+        self.assertEqual(self.total_rsvps(), 0)
+
+    def test_event_delete_cost_does_not_grow_with_rsvps(self):
+        users = User.objects.bulk_create(
+            User(username=f"crowd{i}", email=f"crowd{i}@example.com") for i in range(40)
+        )
+        crowded = Event.objects.create(
+            name="Festival",
+            event_date=self.event.event_date,
+            event_time=time(12),
+            location="Park",
+        )
+        RSVP.objects.bulk_create(RSVP(user=user, event=crowded) for user in users)
+        rebuild_dashboard_stats()
+
+        with CaptureQueriesContext(connection) as small:
+            self.event.delete()
+        with CaptureQueriesContext(connection) as large:
+            crowded.delete()
+        self.assertEqual(len(large), len(small))
+        self.assertLessEqual(len(large), 10)
+        self.assertEqual(self.total_rsvps(), 0)
+        self.assertFalse(RSVP.objects.exists())
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        organizers = Group.objects.create(name="Organizer")
+        cls.organizer = User.objects.create(username="organizer")
+        cls.organizer.groups.set([organizers])
+        cls.superuser = User.objects.create(username="root", is_superuser=True)
+        cls.superuser.groups.set([organizers])
+        category = Category.objects.create(name="Music")
+        Event.objects.bulk_create(
+            Event(
+                name=f"Event {i}",
+                event_date=timezone.localdate() + timedelta(days=i),
+                event_time=time(10),
+                location="Hall",
+                category=category,
+            )
+            for i in range(30)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_page(self, user, query="type=event"):
+        self.client.force_login(user)
+        return self.client.get(f"{reverse('events:view-all')}?{query}")
+
+    def reads_events(self, user, query):
+        """Whether rendering the page had to load a page of events."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_page(user, query)
+        self.assertEqual(response.status_code, 200)
+        return any(
+            'FROM "events_event"' in query["sql"] and "LIMIT" in query["sql"]
+            for query in queries
+        )
+
+    def test_superuser_does_not_share_organizer_pages(self):
+        admin_link = f'href="{reverse("accounts:user-list")}"'
+        self.assertContains(self.get_page(self.superuser), admin_link)
+        self.assertNotContains(self.get_page(self.organizer), admin_link)
+        self.assertContains(self.get_page(self.superuser), admin_link)
+
+    def test_pages_past_the_end_share_the_last_page(self):
+        self.assertTrue(self.reads_events(self.organizer, "per_page=12&page=3"))
+        self.assertFalse(self.reads_events(self.organizer, "per_page=12&page=3"))
+        self.assertFalse(self.reads_events(self.organizer, "per_page=12&page=999"))
+        self.assertContains(
+            self.get_page(self.organizer, "per_page=12&page=999"), "Page 3 of 3"
+        )
+
+    def test_cached_later_pages_run_no_count(self):
+        query = "per_page=12&page=2"
+        self.assertTrue(self.reads_events(self.organizer, query))
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(self.organizer, query)
+        self.assertFalse(any("COUNT(" in q["sql"] for q in queries), queries)
+        self.assertFalse(self.reads_events(self.organizer, "per_page=12&page=02"))
+
+    def test_search_pages_are_not_cached(self):
+        self.assertTrue(self.reads_events(self.organizer, "q=Event+1"))
+        self.assertTrue(self.reads_events(self.organizer, "q=Event+1"))
+
+    def test_unknown_category(self):
+        self.assertTrue(self.reads_events(self.organizer, "type=event"))
+        self.assertFalse(self.reads_events(self.organizer, "category=98765"))
+        self.assertFalse(self.reads_events(self.organizer, "category=²"))
+
+
+class EventListTests(TestCase):
+    """The organizer event list (view-all): sorting, filters, page sizes,
+    description previews and estimated counts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        cls.music = Category.objects.create(name="Music")
+        cls.talks = Category.objects.create(name="Talks")
+        names = ["Opera", "ballet", "Choir", "Jazz", "Recital", "jam session"]
+        Event.objects.bulk_create(
+            Event(
+                name=f"{names[i % len(names)]} {i}",
+                description=f"Short {i}",
+                event_date=cls.today + timedelta(days=i % 7 - 3),
+                event_time=time(10),
+                location="Hall",
+                category=(cls.music, cls.talks, None)[i % 3],
+            )
+            for i in range(30)
+        )
+        cls.long_event = Event.objects.create(
+            name="Lecture",
+            description="Long " + "word " * 200 + "END",
+            event_date=cls.today,
+            event_time=time(10),
+            location="Hall",
+        )
+        cls.organizer = User.objects.create(username="organizer")
+        cls.organizer.groups.set([Group.objects.create(name="Organizer")])
+
+    def setUp(self):
+        cache.clear()
+
+    def page(self, **query):
+        request = RequestFactory().get("/", query)
+        request.user = self.organizer
+        view = ViewAllView()
+        view.setup(request)
+        params = view.event_list_params()
+        return params, view.run_queries(view.event_list_queries(params))["page_obj"]
+
+    def test_sort(self):
+        for sort, order in EVENT_LIST_SORTS.items():
+            with self.subTest(sort=sort):
+                _, page = self.page(sort=sort, per_page=96)
+                self.assertEqual(
+                    list(page.object_list), list(Event.objects.order_by(*order))
+                )
+
+        params, page = self.page(sort="price", per_page=96)
+        self.assertEqual(params["sort"], "-date")
+        self.assertEqual(
+            list(page.object_list),
+            list(Event.objects.order_by(*EVENT_LIST_SORTS["-date"])),
+        )
+
+    def test_filters(self):
+        events = Event.objects.all()
+        for query, expected in [
+            ({"category": self.music.pk}, events.filter(category=self.music)),
+            ({"status": "upcoming"}, events.filter(event_date__gt=self.today)),
+            ({"status": "today"}, events.filter(event_date=self.today)),
+            ({"status": "past"}, events.filter(event_date__lt=self.today)),
+            ({"q": "JA"}, events.filter(name__icontains="ja")),
+            (
+                {"category": self.talks.pk, "status": "past"},
+                events.filter(category=self.talks, event_date__lt=self.today),
+            ),
+            ({"category": 98765, "status": "soon"}, events),
+        ]:
+            with self.subTest(query=query):
+                _, page = self.page(per_page=96, **query)
+                self.assertTrue(expected)
+                self.assertEqual(
+                    {event.pk for event in page.object_list},
+                    set(expected.values_list("pk", flat=True)),
+                )
+
+    def test_per_page(self):
+        _, page = self.page(per_page=12)
+        self.assertEqual(len(page.object_list), 12)
+        self.assertEqual(page.paginator.num_pages, 3)
+
+        for per_page in ("13", "0", "all"):
+            with self.subTest(per_page=per_page):
+                params, page = self.page(per_page=per_page)
+                self.assertEqual(params["per_page"], str(settings.EVENT_LIST_PAGE_SIZE))
+                self.assertEqual(page.paginator.per_page, settings.EVENT_LIST_PAGE_SIZE)
+
+    def test_page_numbers(self):
+        for page, expected in [("0", "1"), ("-1", "1"), ("²", "1"), ("03", "3")]:
+            with self.subTest(page=page):
+                params, _ = self.page(page=page)
+                self.assertEqual(params["page"], expected)
+
+        self.client.force_login(self.organizer)
+        response = self.client.get(
+            reverse("events:view-all"), {"per_page": 12, "page": 0}
+        )
+        self.assertContains(response, "Page 1 of 3")
+
+    def test_description_is_pruned(self):
+        preview_length = settings.EVENT_LIST_DESCRIPTION_PREVIEW
+        _, page = self.page(status="today", per_page=96)
+        event = next(e for e in page.object_list if e.pk == self.long_event.pk)
+        self.assertIn("description", event.get_deferred_fields())
+        self.assertEqual(
+            event.description_preview,
+            self.long_event.description[: preview_length + 1],
+        )
+
+        self.client.force_login(self.organizer)
+        response = self.client.get(
+            reverse("events:view-all"), {"status": "today", "per_page": 96}
+        )
+        self.assertContains(response, "Long word")
+        self.assertContains(response, "…")
+        self.assertNotContains(response, "END")
+
+    @override_settings(EVENT_LIST_ESTIMATE_THRESHOLD=1000)
+    def test_estimated_count(self):
+        with mock.patch(
+            "apps.events.pagination.estimated_row_count", return_value=5000
+        ) as estimate:
+            _, page = self.page()
+            self.assertEqual(page.paginator.count, 5000)
+            self.assertTrue(page.paginator.estimated)
+
+            # Filtered lists are always counted exactly.
+            _, page = self.page(category=self.music.pk)
+            self.assertEqual(page.paginator.count, 10)
+            self.assertFalse(page.paginator.estimated)
+
+            self.client.force_login(self.organizer)
+            response = self.client.get(reverse("events:view-all"))
+            self.assertContains(response, "About 5000 events")
+
+            # Below the threshold, or without an estimate, the count is exact.
+            for rows in (999, None):
+                with self.subTest(rows=rows):
+                    estimate.return_value = rows
+                    _, page = self.page()
+                    self.assertEqual(page.paginator.count, 31)
+                    self.assertFalse(page.paginator.estimated)
+
+
+class CategoryViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        cls.big = Category.objects.create(name="Big")
+        cls.small = Category.objects.create(name="Small")
+        cls.empty = Category.objects.create(name="Empty")
+        cls.size = settings.EVENT_CATEGORY_PREVIEW_SIZE
+        Event.objects.bulk_create(
+            Event(
+                name=f"{category.name} {i}",
+                event_date=cls.today + timedelta(days=i % 5),
+                event_time=time(10),
+                location="Hall",
+                category=category,
+            )
+            for category, count in ((cls.big, cls.size + 5), (cls.small, 2))
+            for i in range(count)
+        )
+        cls.organizer = User.objects.create(username="organizer")
+        cls.organizer.groups.set([Group.objects.create(name="Organizer")])
+
+    def setUp(self):
+        cache.clear()
+
+    def categories(self):
+        request = RequestFactory().get("/", {"type": "category"})
+        request.user = self.organizer
+        view = ViewAllView()
+        view.setup(request)
+        with mock.patch("apps.events.views.render_to_string") as render:
+            view.render_categories({})
+        (_, context, _), _ = render.call_args
+        return {category.pk: category for category in context["categories"]}
+
+    def test_preview_is_capped(self):
+        categories = self.categories()
+        for category, count in ((self.big, self.size + 5), (self.small, 2)):
+            with self.subTest(category=category.name):
+                expected = list(
+                    Event.objects.filter(category=category).order_by(
+                        "-event_date", "-id"
+                    )[: self.size]
+                )
+                found = categories[category.pk]
+                self.assertEqual(found.preview_events, expected)
+                self.assertEqual(found.events_count, count)
+                self.assertEqual(found.more_events_count, max(count - self.size, 0))
+
+        empty = categories[self.empty.pk]
+        self.assertEqual(
+            (empty.preview_events, empty.events_count, empty.more_events_count),
+            ([], 0, 0),
+        )
+
+    def test_page(self):
+        self.client.force_login(self.organizer)
+        response = self.client.get(reverse("events:view-all"), {"type": "category"})
+        self.assertContains(response, f"{self.size + 5} Events")
+        self.assertContains(response, "+5 more")
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Music")
+        cls.events = Event.objects.bulk_create(
+            Event(
+                name=name,
+                event_date=date(2026, 5, 1) + timedelta(days=i),
+                event_time=time(10),
+                location="Hall",
+                category=category,
+            )
+            for i, name in enumerate(
+                ["Jazz Night", '=HYPERLINK("http://x.test")', "-2+3", "@SUM(A1)"]
+            )
+        )
+        cls.organizer = User.objects.create(username="organizer")
+        cls.organizer.groups.set([Group.objects.create(name="Organizer")])
+
+    def setUp(self):
+        self.client.force_login(self.organizer)
+
+    def export(self, **params):
+        response = self.client.get(reverse("events:export"), params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_csv(self):
+        rows = list(csv.reader(StringIO(self.export().decode())))
+        self.assertEqual(rows[0][:4], ["id", "name", "category", "event_date"])
+        self.assertEqual(
+            [row[1] for row in rows[1:]],
+            ["Jazz Night", '\'=HYPERLINK("http://x.test")', "'-2+3", "'@SUM(A1)"],
+        )
+        self.assertEqual(rows[1][3], "2026-05-01")
+
+    def test_phone_numbers_are_not_escaped(self):
+        event = self.events[0]
+        for i, phone in enumerate(["+8801711000", "-1711000", "+1 (555) 01", ""]):
+            user = User.objects.create(username=f"guest{i}", phone_number=phone)
+            RSVP.objects.create(user=user, event=event)
+        user = User.objects.create(username="sneaky", phone_number="+1+cmd|A1")
+        RSVP.objects.create(user=user, event=event)
+
+        response = self.client.get(reverse("events:export-rsvps", args=[event.pk]))
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(
+            [row["phone_number"] for row in rows],
+            ["+8801711000", "-1711000", "+1 (555) 01", "", "'+1+cmd|A1"],
+        )
+
+    def test_export_views_must_define_get_export(self):
+        class IncompleteExportView(ExportMixin, View):
+            export_name = "incomplete"
+
+        with self.assertRaisesMessage(
+            ImproperlyConfigured, "IncompleteExportView must define get_export()."
+        ):
+            IncompleteExportView.as_view()(RequestFactory().get("/"))
+
+    def test_ndjson_is_not_escaped(self):
+        lines = self.export(format="ndjson").decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)["name"] for line in lines],
+            [event.name for event in self.events],
+        )
+
+    def test_gzip(self):
+        self.assertEqual(gzip.decompress(self.export(gzip="1")), self.export())
+
+    async def test_asgi_streams_asynchronously(self):
+        await self.async_client.aforce_login(self.organizer)
+        response = await self.async_client.get(reverse("events:export"))
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(body, await sync_to_async(self.export)())
+
+
+class ImportTests(TestCase):
+    CSV = (
+        "name,description,event_date,event_time,location,category\n"
+        "Jazz Night,Live music,2026-05-01,19:00,Riverside Hall,music\n"
+        "No Date,,,19:00,Hall,Music\n"
+        "Bad Category,,2026-05-02,10:00,Hall,Sport\n"
+        ",,2026-05-03,25:00,Hall,Music\n"
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.create(name="Music")
+        cls.organizer = User.objects.create(username="organizer")
+        cls.organizer.groups.set([Group.objects.create(name="Organizer")])
+
+    def import_file(self, data, fmt="csv", compressed=False):
+        return import_events(read_rows(BytesIO(data), fmt, compressed))
+
+    def upload(self, name, data):
+        self.client.force_login(self.organizer)
+        return self.client.post(
+            reverse("events:import"), {"file": SimpleUploadedFile(name, data)}
+        )
+
+    def test_csv(self):
+        result = self.import_file(self.CSV.encode())
+        self.assertEqual((result.rows, result.created), (4, 1))
+        self.assertEqual(
+            [(line, sorted(errors)) for line, errors in result.errors],
+            [
+                (3, ["event_date"]),
+                (4, ["category"]),
+                (5, ["event_time", "name"]),
+            ],
+        )
+        event = Event.objects.get()
+        self.assertEqual(event.event_date, date(2026, 5, 1))
+        self.assertEqual(event.category.name, "Music")
+
+    def test_ndjson_values_of_the_wrong_type(self):
+        valid = {
+            "name": "Jazz Night",
+            "event_date": "2026-05-01",
+            "event_time": "19:00",
+            "location": "Hall",
+            "category": "Music",
+        }
+        lines = [
+            valid,
+            {**valid, "event_date": 20260501},
+            {**valid, "event_time": [19, 0]},
+            {**valid, "event_date": {"year": 2026}, "name": 5},
+            {**valid, "category": 1},
+            ["not", "an", "object"],
+        ]
+        data = "\n".join(json.dumps(line) for line in lines).encode()
+
+        result = self.import_file(data, "ndjson")
+        self.assertEqual((result.rows, result.created), (6, 1))
+        self.assertEqual(
+            [(line, sorted(errors)) for line, errors in result.errors],
+            [
+                (2, ["event_date"]),
+                (3, ["event_time"]),
+                (4, ["event_date", "name"]),
+                (5, ["category"]),
+                (6, ["__all__"]),
+            ],
+        )
+
+    def test_gzip(self):
+        result = self.import_file(gzip.compress(self.CSV.encode()), compressed=True)
+        self.assertEqual(result.created, 1)
+
+    def test_unreadable_files(self):
+        compressed = gzip.compress(self.CSV.encode())
+        corrupt = compressed[:20] + bytes(b ^ 0xFF for b in compressed[20:40])
+        files = {
+            "truncated.csv.gz": compressed[: len(compressed) // 2],
+            "corrupt.csv.gz": corrupt + compressed[40:],
+            "not-gzip.csv.gz": self.CSV.encode(),
+            "latin1.csv": "name\nCafé Night\n".encode("latin-1"),
+            "oversized-field.csv": b"name\n" + b"x" * (csv.field_size_limit() + 1),
+        }
+        for name, data in files.items():
+            with self.subTest(name):
+                response = self.upload(name, data)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, "The file could not be read.")
+        self.assertFalse(Event.objects.exists())
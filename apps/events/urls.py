@@ -1,24 +1,50 @@
+from django.conf import settings
 from django.urls import path
 
 from apps.events.views import (
+    AsyncDashboardView,
+    AsyncRSVPView,
+    AsyncViewAllView,
     DashboardView,
     CreateFormView,
+    ImportEventsView,
     DeleteFormView,
     UpdateFormView,
     ViewAllView,
     RSVPView,
     RSVPEventView,
     RSVPDeleteView,
+    ExportEventsView,
+    ExportRSVPsView,
 )
 
+# ASYNC_VIEWS serves the listing pages from their async versions, for ASGI
+# servers.
 app_name = "events"
 urlpatterns = [
-    path("dashboard/", DashboardView.as_view(), name="dashboard"),
-    path("view-all/", ViewAllView.as_view(), name="view-all"),
+    path(
+        "dashboard/",
+        (AsyncDashboardView if settings.ASYNC_VIEWS else DashboardView).as_view(),
+        name="dashboard",
+    ),
+    path(
+        "view-all/",
+        (AsyncViewAllView if settings.ASYNC_VIEWS else ViewAllView).as_view(),
+        name="view-all",
+    ),
     path("create-form/", CreateFormView.as_view(), name="create-form"),
+    path("import/", ImportEventsView.as_view(), name="import"),
     path("update-form/<int:id>/", UpdateFormView.as_view(), name="update-form"),
     path("delete/<int:id>/", DeleteFormView.as_view(), name="delete"),
-    path("rsvp-view/", RSVPView.as_view(), name="rsvp-view"),
+    path(
+        "rsvp-view/",
+        (AsyncRSVPView if settings.ASYNC_VIEWS else RSVPView).as_view(),
+        name="rsvp-view",
+    ),
     path("dashboard/rsvp/<int:event_id>/", RSVPEventView.as_view(), name="rsvp"),
     path("rsvp-delete/<int:id>/", RSVPDeleteView.as_view(), name="rsvp-delete"),
+    path("export/", ExportEventsView.as_view(), name="export"),
+    path(
+        "export/<int:event_id>/rsvps/", ExportRSVPsView.as_view(), name="export-rsvps"
+    ),
 ]
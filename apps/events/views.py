@@ -1,110 +1,163 @@
+from functools import partial
 from typing import cast
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
 from django.db import models
-from django.db.models import Case, IntegerField, Value, When
-from django.db.models.functions import Extract
+from django.db.models.functions import Substr
+from django.http import QueryDict
 from django.shortcuts import redirect, render, get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from django.contrib import messages
 
+from apps.core.asyncviews import AsyncAccessMixin, gather_queries
+from apps.core.exports import ExportMixin
 from apps.core.helpers import is_admin_or_organizer, is_participant
-from apps.events.forms import CategoryModelForm, EventModelForm
-from apps.events.models import RSVP, Category, Event
+from apps.events.cards import render_event_cards
+from apps.events.exports import export_attendees, export_events
+from apps.events.filters import DashboardFilters, facet_counts
+from apps.events.imports import (
+    READ_ERRORS,
+    detect_format,
+    import_events,
+    read_rows,
+)
+from apps.events.forms import CategoryModelForm, EventImportForm, EventModelForm
+from apps.events.models import PAST, RSVP, Category, Event
+from apps.events.page_cache import cached_listing_value, cached_page
+from apps.events.pagination import (
+    EstimatedCountPaginator,
+    OffsetPaginator,
+    TimelinePaginationMixin,
+)
+from apps.events.stats import get_dashboard_stats
 from django.views import View
 from django.views.generic import ListView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 
 
-class DashboardView(LoginRequiredMixin, ListView):
+class DashboardView(LoginRequiredMixin, TimelinePaginationMixin, ListView):
     model = Event
     template_name = "dashboard.html"
+    partial_template_name = "partials/dashboard-results.html"
     context_object_name = "events"
+    paginate_by = 12
+    ranked = False
+    query_budget = 8
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        # One date for the whole request, so the badges, the ordering and
+        # the card cache keys cannot disagree around midnight.
+        self.today = timezone.localdate()
+        self.filters = DashboardFilters.from_query(request.GET)
 
     def get_queryset(self):
-        today = timezone.localdate()
-        qs = Event.objects.select_related("category").all()
-
-        filter_type = self.request.GET.get("type")
-
-        def sorted_queryset(queryset):
-            return queryset.annotate(
-                sort_group=Case(
-                    When(event_date__gte=today, then=Value(0)),
-                    When(event_date__lt=today, then=Value(1)),
-                    output_field=IntegerField(),
-                ),
-                sort_date=Case(
-                    When(
-                        event_date__gte=today,
-                        then=Extract("event_date", lookup_name="epoch"),
-                    ),
-                    When(
-                        event_date__lt=today,
-                        then=-Extract("event_date", lookup_name="epoch"),
-                    ),
-                    output_field=IntegerField(),
-                ),
-            ).order_by("sort_group", "sort_date")
-
-        if filter_type == "search":
-            value = self.request.GET.get("search-value")
-            if value:
-                qs = qs.filter(
-                    models.Q(name__icontains=value)
-                    | models.Q(location__icontains=value)
-                )
-                qs = sorted_queryset(qs)
-
-        elif filter_type == "category":
-            category_id = self.request.GET.get("id")
-            if category_id:
-                qs = qs.filter(category=category_id)
-                qs = sorted_queryset(qs)
-
-        elif filter_type == "upcoming_events":
-            qs = qs.filter(event_date__gt=today).order_by("event_date")
-
-        elif filter_type == "past_events":
-            qs = qs.filter(event_date__lt=today).order_by("-event_date")
-
-        elif filter_type == "all_events":
-            qs = sorted_queryset(qs)
-
-        elif filter_type == "date-range":
-            date_from = self.request.GET.get("date-from")
-            date_to = self.request.GET.get("date-to")
-            if date_from and date_to:
-                qs = qs.filter(
-                    event_date__gte=date_from,
-                    event_date__lte=date_to,
-                )
-                qs = sorted_queryset(qs)
+        qs = Event.objects.select_related("category").with_day_status(self.today)
+        qs = self.filters.apply(qs, self.today)
 
+        # Ranked search results are in no order a cursor can seek to.
+        self.ranked = bool(self.filters.q)
         return qs
 
+    def paginate_queryset(self, queryset, page_size):
+        if not self.ranked:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = OffsetPaginator(queryset, page_size)
+        page = paginator.page(self.request.GET.get("page"))
+        page.next_query = self._cursor_query("page", page.next_cursor)
+        page.previous_query = self._cursor_query("page", page.previous_cursor)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def is_partial(self):
+        """Whether only the results fragment is wanted, as the dashboard's
+        filters ask for it with an ``X-Partial: results`` header; links can
+        use ``?partial=results``."""
+        return "results" in (
+            self.request.headers.get("X-Partial"),
+            self.request.GET.get("partial"),
+        )
+
+    def get_template_names(self):
+        if self.is_partial():
+            return [self.partial_template_name]
+        return super().get_template_names()
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        patch_vary_headers(response, ["X-Partial"])
+        return response
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        today = timezone.localdate()
+        for name, query in self.dashboard_queries().items():
+            context[name] = query()
+        context["event_cards"] = render_event_cards(
+            self.request, context["events"], self.today
+        )
 
-        context["count"] = Event.objects.aggregate(
-            total_rsvps=models.Count("rsvps", distinct=True),
-            total_events=models.Count("id", distinct=True),
-            upcoming_events=models.Count(
-                "id", filter=models.Q(event_date__gt=today), distinct=True
-            ),
-            past_events=models.Count(
-                "id", filter=models.Q(event_date__lt=today), distinct=True
+        return context
+
+    def dashboard_queries(self):
+        """The page's queries besides the event list, by context name. None
+        of them depends on another or on the list, and the results fragment
+        only needs the facet counts."""
+        today = self.today
+        queries = {
+            "facets": lambda: facet_counts(Event.objects.all(), self.filters, today),
+        }
+        if self.is_partial():
+            return queries
+
+        return {
+            **queries,
+            "count": get_dashboard_stats,
+            "today": lambda: list(
+                Event.objects.select_related("category").filter(event_date=today)
             ),
-        )
+        }
+
 
-        context["today"] = Event.objects.filter(event_date=today)
-        context["categories"] = Category.objects.all()
+class AsyncDashboardView(AsyncAccessMixin, DashboardView):
+    """DashboardView for ASGI servers. The event list, the counters, today's
+    events and the facet counts are loaded concurrently."""
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        results = await gather_queries(
+            {"list": self.get_list_context_data, **self.dashboard_queries()}
+        )
+        context = {**results.pop("list"), **results}
+        context["event_cards"] = await sync_to_async(render_event_cards)(
+            request, context["events"], self.today
+        )
+        return self.render_to_response(context)
 
+    def get_list_context_data(self):
+        # ListView's context alone, without DashboardView's additions.
+        context = super(DashboardView, self).get_context_data()
+        context["events"] = context["object_list"] = list(context["object_list"])
         return context
 
 
+EVENT_LIST_SORTS = {
+    "date": ("event_date", "id"),
+    "-date": ("-event_date", "-id"),
+    "name": ("name", "id"),
+    "-name": ("-name", "-id"),
+    "created": ("created_at", "id"),
+    "-created": ("-created_at", "-id"),
+}
+EVENT_LIST_STATUSES = ("upcoming", "today", "past")
+
+
 class ViewAllView(LoginRequiredMixin, UserPassesTestMixin, View):
+    query_budget = 6
+
     def test_func(self):
         return is_admin_or_organizer(self.request.user)
 
@@ -117,24 +170,187 @@ class ViewAllView(LoginRequiredMixin, UserPassesTestMixin, View):
         view_type = request.GET.get("type")
 
         if view_type == "category":
-            categories = Category.objects.prefetch_related("events").annotate(
-                events_count=models.Count("events", distinct=True)
+            return cached_page(request, "category", self.render_categories)
+
+        params = self.event_list_params()
+        paginator = self.event_list_paginator(params)
+        # Search terms are free text, so their pages are not cached.
+        cacheable = "q" not in params
+
+        if cacheable and params["page"] != "1":
+            # Pages past the end show the last page; share its cached copy
+            # instead of caching one per number asked for. The page count is
+            # cached too, so a cached page costs no COUNT.
+            listing = params.copy()
+            del listing["page"]
+            num_pages = cached_listing_value(
+                f"event-pages:{listing.urlencode()}", lambda: paginator.num_pages
+            )
+            params["page"] = str(min(int(params["page"]), num_pages))
+
+        return cached_page(
+            request,
+            f"event:{params.urlencode()}",
+            partial(self.render_events, params, paginator),
+            cacheable=cacheable,
+        )
+
+    def event_list_params(self):
+        """The event list's query parameters, with unknown values dropped and
+        defaults filled in, so equivalent URLs share one cached page."""
+        query = self.request.GET
+        params = QueryDict(mutable=True)
+
+        sort = query.get("sort")
+        params["sort"] = sort if sort in EVENT_LIST_SORTS else "-date"
+
+        per_page = query.get("per_page")
+        page_sizes = [str(size) for size in settings.EVENT_LIST_PAGE_SIZES]
+        params["per_page"] = (
+            per_page if per_page in page_sizes else str(settings.EVENT_LIST_PAGE_SIZE)
+        )
+
+        category = query.get("category", "")
+        if (
+            category.isascii()
+            and category.isdigit()
+            and Category.objects.filter(pk=category).exists()
+        ):
+            params["category"] = str(int(category))
+
+        status = query.get("status")
+        if status in EVENT_LIST_STATUSES:
+            params["status"] = status
+
+        search = query.get("q", "").strip()
+        if search:
+            params["q"] = search
+
+        page = query.get("page", "")
+        page = int(page) if page.isascii() and page.isdigit() else 1
+        params["page"] = str(max(page, 1))
+        return params
+
+    def render_categories(self, extra_context):
+        # Slicing the prefetch makes Django number each category's events
+        # with ROW_NUMBER() OVER (PARTITION BY category_id) and keep the
+        # first few, so only names for the preview are ever loaded.
+        preview = Event.objects.only("id", "name", "category_id").order_by(
+            "-event_date", "-id"
+        )[: settings.EVENT_CATEGORY_PREVIEW_SIZE]
+        categories = list(
+            Category.objects.prefetch_related(
+                models.Prefetch("events", queryset=preview, to_attr="preview_events")
+            ).annotate(events_count=models.Count("events"))
+        )
+        for category in categories:
+            category.more_events_count = category.events_count - len(
+                category.preview_events
             )
-            context = {
-                "title": "Category",
-                "categories": categories,
-            }
-            return render(request, "view/category-view.html", context)
 
-        events = Event.objects.select_related("category").all()
+        context = {
+            "title": "Category",
+            "categories": categories,
+            **extra_context,
+        }
+        return render_to_string("view/category-view.html", context, self.request)
+
+    def run_queries(self, queries):
+        return {name: query() for name, query in queries.items()}
+
+    def event_list_paginator(self, params):
+        today = timezone.localdate()
+        preview_length = settings.EVENT_LIST_DESCRIPTION_PREVIEW
+
+        # The card only shows the start of the description, so load that
+        # slice (one extra character tells truncatechars to add the
+        # ellipsis) instead of the whole column.
+        events = (
+            Event.objects.select_related("category")
+            .with_day_status(today)
+            .defer("description", "search_vector", "category__description")
+            .annotate(description_preview=Substr("description", 1, preview_length + 1))
+        )
+
+        if "category" in params:
+            events = events.filter(category_id=params["category"])
+        if params.get("status") == "upcoming":
+            events = events.filter(event_date__gt=today)
+        elif params.get("status") == "today":
+            events = events.filter(event_date=today)
+        elif params.get("status") == "past":
+            events = events.filter(event_date__lt=today)
+        if "q" in params:
+            events = events.filter(name__icontains=params["q"])
+
+        filtered = any(name in params for name in ("category", "status", "q"))
+        return EstimatedCountPaginator(
+            events.order_by(*EVENT_LIST_SORTS[params["sort"]]),
+            int(params["per_page"]),
+            estimate=not filtered,
+        )
+
+    def event_list_queries(self, params, paginator=None):
+        """The event list page and the category filter's options, by context
+        name."""
+        paginator = paginator or self.event_list_paginator(params)
+
+        def page():
+            page = paginator.get_page(params["page"])
+            page.object_list = list(page.object_list)
+            return page
+
+        return {
+            "page_obj": page,
+            "categories": lambda: list(Category.objects.only("id", "name")),
+        }
+
+    def render_events(self, params, paginator, extra_context):
+        results = self.run_queries(self.event_list_queries(params, paginator))
+        page = results["page_obj"]
+
         context = {
             "title": "Event",
-            "events": events,
+            "events": page.object_list,
+            "page_obj": page,
+            "paginator": page.paginator,
+            "params": params,
+            "preview_length": settings.EVENT_LIST_DESCRIPTION_PREVIEW,
+            "categories": results["categories"],
+            "page_sizes": settings.EVENT_LIST_PAGE_SIZES,
+            "previous_query": self._page_query(
+                params, page.has_previous() and page.previous_page_number()
+            ),
+            "next_query": self._page_query(
+                params, page.has_next() and page.next_page_number()
+            ),
+            **extra_context,
         }
-        return render(request, "view/event-view.html", context)
+        return render_to_string("view/event-view.html", context, self.request)
+
+    def _page_query(self, params, number):
+        if not number:
+            return None
+        params = params.copy()
+        params["page"] = number
+        return params.urlencode()
+
+
+class AsyncViewAllView(AsyncAccessMixin, ViewAllView):
+    """ViewAllView for ASGI servers. On a cache miss the event list page and
+    the categories are loaded concurrently."""
+
+    async def get(self, request, *args, **kwargs):
+        # cached_page is synchronous; it calls run_queries from its thread.
+        return await sync_to_async(super().get)(request, *args, **kwargs)
+
+    def run_queries(self, queries):
+        return async_to_sync(gather_queries)(queries)
 
 
 class CreateFormView(LoginRequiredMixin, UserPassesTestMixin, View):
+    query_budget = 4
+
     def test_func(self):
         return is_admin_or_organizer(self.request.user)
 
@@ -192,7 +408,68 @@ class CreateFormView(LoginRequiredMixin, UserPassesTestMixin, View):
         )
 
 
+class ImportEventsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    error_limit = 100
+
+    def test_func(self):
+        return is_admin_or_organizer(self.request.user)
+
+    def handle_no_permission(self):
+        if not self.request.user.is_authenticated:
+            return super().handle_no_permission()
+        return redirect("core:no-permission")
+
+    def render_form(self, form, result=None):
+        return render(
+            self.request,
+            "form/import-events.html",
+            {
+                "title": "Import Events",
+                "import_form": form,
+                "result": result,
+                "errors": result.errors[: self.error_limit] if result else [],
+            },
+        )
+
+    def get(self, request, *args, **kwargs):
+        return self.render_form(EventImportForm())
+
+    def post(self, request, *args, **kwargs):
+        form = EventImportForm(request.POST, request.FILES)
+        if not form.is_valid():
+            messages.error(request, "Please correct the errors below.")
+            return self.render_form(form)
+
+        upload = form.cleaned_data["file"]
+        fmt, compressed = detect_format(upload.name)
+        try:
+            result = import_events(
+                read_rows(upload, fmt, compressed),
+                dry_run=form.cleaned_data["dry_run"],
+            )
+        except READ_ERRORS:
+            messages.error(request, "The file could not be read.")
+            return self.render_form(form)
+
+        if form.cleaned_data["dry_run"]:
+            messages.success(
+                request,
+                f"Checked {result.rows} rows: {len(result.errors)} with errors.",
+            )
+        elif result.errors:
+            messages.error(
+                request,
+                f"Created {result.created} events; "
+                f"{len(result.errors)} rows were skipped.",
+            )
+        else:
+            messages.success(request, f"Created {result.created} events.")
+        return self.render_form(EventImportForm(), result)
+
+
 class UpdateFormView(LoginRequiredMixin, UserPassesTestMixin, View):
+    query_budget = 5
+
     def test_func(self):
         return is_admin_or_organizer(self.request.user)
 
@@ -282,11 +559,16 @@ class DeleteFormView(LoginRequiredMixin, UserPassesTestMixin, View):
         return redirect(f"{reverse('events:view-all')}?type=event")
 
 
-class RSVPView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class RSVPView(
+    LoginRequiredMixin, UserPassesTestMixin, TimelinePaginationMixin, ListView
+):
 
     model = RSVP
     template_name = "view/rsvp-view.html"
     context_object_name = "rsvps"
+    paginate_by = 12
+    timeline_date_field = "event__event_date"
+    query_budget = 5
 
     def test_func(self):
         return is_participant(self.request.user)
@@ -296,31 +578,15 @@ class RSVPView(LoginRequiredMixin, UserPassesTestMixin, ListView):
             return super().handle_no_permission()
         return redirect("core:no-permission")
 
-    def get_queryset(self):
-        today = timezone.localdate()
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.today = timezone.localdate()
 
+    def get_queryset(self):
         return (
-            RSVP.objects.select_related("event")
-            .filter(user=self.request.user)
-            .annotate(
-                sort_group=Case(
-                    When(event__event_date__gte=today, then=Value(0)),
-                    When(event__event_date__lt=today, then=Value(1)),
-                    output_field=IntegerField(),
-                ),
-                sort_date=Case(
-                    When(
-                        event__event_date__gte=today,
-                        then=Extract("event__event_date", "epoch"),
-                    ),
-                    When(
-                        event__event_date__lt=today,
-                        then=-Extract("event__event_date", "epoch"),
-                    ),
-                    output_field=IntegerField(),
-                ),
-            )
-            .order_by("sort_group", "sort_date")
+            RSVP.objects.select_related("event__category")
+            .for_user(self.request.user)
+            .with_day_status(self.today)
         )
 
     def get_context_data(self, **kwargs):
@@ -329,6 +595,16 @@ class RSVPView(LoginRequiredMixin, UserPassesTestMixin, ListView):
         return context
 
 
+class AsyncRSVPView(AsyncAccessMixin, RSVPView):
+    """RSVPView for ASGI servers. The page is one chain of dependent queries,
+    so there is nothing to run concurrently; it is read in a thread."""
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        context = await sync_to_async(self.get_context_data)()
+        return self.render_to_response(context)
+
+
 class RSVPEventView(LoginRequiredMixin, UserPassesTestMixin, View):
 
     def test_func(self):
@@ -340,13 +616,15 @@ class RSVPEventView(LoginRequiredMixin, UserPassesTestMixin, View):
         return redirect("core:no-permission")
 
     def post(self, request, event_id):
-        event = get_object_or_404(Event, id=event_id)
+        event = get_object_or_404(
+            Event.objects.with_day_status(timezone.localdate()), id=event_id
+        )
 
-        if event.day_status == "Past":
+        if event.day_status == PAST:
             messages.info(request, "This event has passed away.")
             return redirect("events:rsvp-view")
 
-        if not request.user.groups.filter(name="Participant").exists():
+        if not is_participant(request.user):
             messages.error(request, "Only participants can RSVP for events.")
             return redirect("events:dashboard")
 
@@ -378,6 +656,13 @@ class RSVPDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
             return super().handle_no_permission()
         return redirect("core:no-permission")
 
+    def get_queryset(self):
+        return (
+            RSVP.objects.for_user(self.request.user)
+            .select_related("event")
+            .with_day_status(timezone.localdate())
+        )
+
     def get(self, request, *args, **kwargs):
         messages.error(request, "Invalid request.")
         return redirect("events:rsvp-view")
@@ -385,7 +670,7 @@ class RSVPDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     def post(self, request, *args, **kwargs):
         rsvp = cast(RSVP, self.get_object())
 
-        if rsvp.event.day_status == "Past":
+        if rsvp.event_status == PAST:
             messages.error(request, "You cannot cancel an RSVP for a past event.")
             return redirect("events:rsvp-view")
 
@@ -398,3 +683,33 @@ class RSVPDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
                 "Something went wrong. Please try again.",
             )
         return redirect("events:rsvp-view")
+
+
+class ExportEventsView(LoginRequiredMixin, UserPassesTestMixin, ExportMixin, View):
+    export_name = "events"
+
+    def test_func(self):
+        return is_admin_or_organizer(self.request.user)
+
+    def handle_no_permission(self):
+        if not self.request.user.is_authenticated:
+            return super().handle_no_permission()
+        return redirect("core:no-permission")
+
+    def get_export(self):
+        return export_events()
+
+
+class ExportRSVPsView(LoginRequiredMixin, UserPassesTestMixin, ExportMixin, View):
+    def test_func(self):
+        return is_admin_or_organizer(self.request.user)
+
+    def handle_no_permission(self):
+        if not self.request.user.is_authenticated:
+            return super().handle_no_permission()
+        return redirect("core:no-permission")
+
+    def get_export(self):
+        event = get_object_or_404(Event.objects.only("id"), id=self.kwargs["event_id"])
+        self.export_name = f"event-{event.id}-attendees"
+        return export_attendees(event.id)
@@ -1,13 +1,117 @@
-from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
 
+from apps.core.instrumentation import (
+    QueryBudgetExceeded,
+    RequestMetrics,
+    current_metrics,
+)
+from apps.core.metrics import REQUEST_DB_TIME, REQUEST_LATENCY, REQUEST_QUERIES
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """Time each request's SQL queries, template rendering and total run time.
+
+    The numbers are sent back in a ``Server-Timing`` header and logged under
+    the resolved URL name. Views can declare a ``query_budget``; going over
+    it logs a warning, or raises when ``QUERY_BUDGET_STRICT`` is on.
+
+    Queries are counted by a wrapper installed on every connection (see
+    ``apps.core.signals``), so those run on other threads for the request,
+    as async views do, are included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.total_time = time.perf_counter() - start
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.total_time = time.perf_counter() - start
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        request.metrics = metrics
+        response["Server-Timing"] = server_timing(metrics)
+        self.export(metrics, response)
+        logger.debug(
+            "%s queries=%d db=%.1fms template=%.1fms total=%.1fms",
+            metrics.view_name,
+            metrics.queries,
+            metrics.db_time * 1000,
+            metrics.template_time * 1000,
+            metrics.total_time * 1000,
+        )
+        self.check_query_budget(request, metrics)
+        return response
+
+    def export(self, metrics, response):
+        view = metrics.view_name or "unresolved"
+        REQUEST_LATENCY.observe(
+            metrics.total_time, view=view, status=response.status_code
+        )
+        REQUEST_QUERIES.inc(metrics.queries, view=view)
+        REQUEST_DB_TIME.inc(metrics.db_time, view=view)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return None
+
+        metrics.view_name = request.resolver_match.view_name
+        view_class = getattr(view_func, "view_class", None)
+        metrics.query_budget = getattr(
+            view_class, "query_budget", getattr(view_func, "query_budget", None)
+        )
+        return None
+
+    def check_query_budget(self, request, metrics):
+        if metrics.query_budget is None or metrics.queries <= metrics.query_budget:
+            return
+
+        message = (
+            f"{metrics.view_name} ran {metrics.queries} queries, over its "
+            f"budget of {metrics.query_budget} ({request.method} {request.path})."
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
 
-class WhiteNoiseMediaMiddleware(BaseWhiteNoiseMiddleware):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if hasattr(settings, "MEDIA_ROOT") and hasattr(settings, "MEDIA_URL"):
-            media_root = str(settings.MEDIA_ROOT)
-            media_url = settings.MEDIA_URL
-            if media_url.startswith("/"):
-                media_url = media_url[1:]
-            self.add_files(media_root, prefix=media_url)
+def server_timing(metrics):
+    return ", ".join(
+        [
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f"tpl;dur={metrics.template_time * 1000:.1f}",
+            f"total;dur={metrics.total_time * 1000:.1f}",
+        ]
+    )
@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "apps.accounts",
     "apps.core",
     "apps.events",
@@ -39,6 +40,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    "config.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -66,7 +68,7 @@ ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "apps.core.instrumentation.DjangoTemplatesWithTiming",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -104,6 +106,29 @@ else:
         }
     }
 
+# The test run gets its own in-memory cache, so it never reads entries left
+# in the shared cache by the dev server, the bench or an earlier run.
+TESTING = sys.argv[1:2] == ["test"]
+
+if TESTING:
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+elif os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ.get("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("CACHE_DIR", BASE_DIR / ".cache"),
+        }
+    }
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -126,12 +151,19 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
-
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
-
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Runs the tests with a temporary MEDIA_ROOT.
+TEST_RUNNER = "config.test_runner.TestRunner"
+
+# Uploads go through a storage that indexes them for the media view. Static
+# files use Django's plain storage.
+STORAGES = {
+    "default": {"BACKEND": "apps.core.media.IndexedFileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 WHITENOISE_AUTOREFRESH = True if DEBUG else False
 WHITENOISE_USE_FINDERS = True if DEBUG else False
 
@@ -150,6 +182,65 @@ ANYMAIL = {
 }
 DEFAULT_FROM_EMAIL = os.environ.get("EMAIL_HOST_USER")
 
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 60 * 60
+
+EVENT_NOTICE_BATCH_SIZE = 100
+EVENT_NOTICE_MAX_ATTEMPTS = 5
+
+# Rendered dashboard event cards are keyed on the local date, so a day is
+# the longest any of them can still be served.
+EVENT_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+EVENT_LISTING_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Event names shown under each category on the view-all category page.
+EVENT_CATEGORY_PREVIEW_SIZE = 8
+
+# Organizer event list (view-all). Above EVENT_LIST_ESTIMATE_THRESHOLD rows
+# the unfiltered list shows the planner's row estimate instead of COUNT(*).
+EVENT_LIST_PAGE_SIZE = 24
+EVENT_LIST_PAGE_SIZES = (12, 24, 48, 96)
+EVENT_LIST_ESTIMATE_THRESHOLD = 100_000
+EVENT_LIST_DESCRIPTION_PREVIEW = 200
+
+# Raise instead of logging a warning when a view runs more SQL queries than
+# its query_budget allows.
+QUERY_BUDGET_STRICT = os.environ.get("QUERY_BUDGET_STRICT", "False") == "True"
+
+# Each process writes its metrics to a file here so /metrics can report all
+# gunicorn workers and the background commands together. Set METRICS_DIR to
+# an empty string to keep metrics in-process only. /metrics requires
+# METRICS_TOKEN as a bearer token, and without one is only served when DEBUG
+# is on. Test runs keep theirs in-process, so they never show up in the dev
+# server's /metrics.
+METRICS_DIR = "" if TESTING else os.environ.get("METRICS_DIR", BASE_DIR / ".metrics")
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Rows fetched per database round trip, and joined into each response chunk,
+# by the streaming CSV/NDJSON exports.
+EXPORT_CHUNK_SIZE = 2000
+
+# Valid rows inserted per bulk_create and transaction by the event import.
+EVENT_IMPORT_BATCH_SIZE = 1000
+
+# Widths of the resized WebP/JPEG copies made of uploaded images, and the
+# number of background threads that make them.
+IMAGE_DERIVATIVE_WIDTHS = (160, 320, 640, 960)
+IMAGE_DERIVATIVE_WORKERS = 2
+
+# Route the dashboard, event list and RSVP list to their async views, which
+# run independent queries concurrently; meant for ASGI servers such as
+# uvicorn. Each worker process keeps up to ASYNC_QUERY_WORKERS extra
+# database connections for them.
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "False") == "True"
+ASYNC_QUERY_WORKERS = 8
+
 TAILWIND_APP_NAME = "theme"
 
+EVENT_SEARCH_CONFIG = "english"
+EVENT_SEARCH_TRIGRAM_THRESHOLD = 0.5
+
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
@@ -0,0 +1,32 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Files the templates expect to find in MEDIA_ROOT.
+DEFAULT_MEDIA = ("events/default.jpg", "profile/default.jpg")
+
+
+class TestRunner(DiscoverRunner):
+    """Run the tests against a throwaway MEDIA_ROOT holding copies of the
+    default images, so uploads and image derivatives made while rendering
+    never land in the project's media directory."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.media_root = Path(tempfile.mkdtemp(prefix="media-"))
+        for name in DEFAULT_MEDIA:
+            target = self.media_root / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(Path(settings.MEDIA_ROOT) / name, target)
+
+        self.media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.media_settings.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -1,8 +1,8 @@
 from django.contrib import admin
 from django.urls import include, path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
-from django.views.static import serve
+
+from apps.core.views import media_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -12,7 +12,9 @@ urlpatterns = [
 ]
 
 urlpatterns += [
-    re_path(r"^media/(?P<path>.*)$", serve, {"document_root": settings.MEDIA_ROOT}),
+    re_path(
+        rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.*)$", media_view, name="media"
+    ),
 ]
 
 
@@ -21,5 +23,3 @@ if settings.DEBUG:
         path("__debug__/", include("debug_toolbar.urls")),
         path("__reload__/", include("django_browser_reload.urls")),
     ]
-
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)